@@ -0,0 +1,84 @@
+from datetime import date
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from api_v1.analytics import schemas
+from api_v1.analytics.schemas import TopProductsBy
+from core.models import DailyProductSales, DailyPromocodeUsage, DailySales, Product
+
+# every query reads the daily rollups, so the cost depends on the number of days
+# in the range, not on the number of orders
+
+
+def filter_days(
+    stmt: Select, day_column: InstrumentedAttribute[date], date_from: date | None, date_to: date | None
+) -> Select:
+    if date_from is not None:
+        stmt = stmt.where(day_column >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(day_column <= date_to)
+    return stmt
+
+
+async def get_daily_revenue(
+    session: AsyncSession,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[schemas.DailyRevenue]:
+    stmt = filter_days(select(DailySales).order_by(DailySales.day), DailySales.day, date_from, date_to)
+    days = await session.scalars(stmt)
+    return [schemas.DailyRevenue.model_validate(day) for day in days]
+
+
+async def get_top_products(
+    session: AsyncSession,
+    by: TopProductsBy,
+    limit: int,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[schemas.ProductSales]:
+    units = func.sum(DailyProductSales.units).label("units")
+    revenue = func.sum(DailyProductSales.revenue).label("revenue")
+    top = filter_days(
+        # lines added and removed again leave rollup rows at zero; like the snapshot's
+        # top products, only products with units actually sold are ranked
+        select(DailyProductSales.product_id, units, revenue).group_by(DailyProductSales.product_id).having(units > 0),
+        DailyProductSales.day,
+        date_from,
+        date_to,
+    )
+    top = top.order_by((units if by is TopProductsBy.units else revenue).desc(), DailyProductSales.product_id)
+    top = top.limit(limit).subquery()
+    # names are joined after the LIMIT, for limit rows only
+    stmt = (
+        select(top.c.product_id, Product.name, top.c.units, top.c.revenue)
+        .outerjoin(Product, Product.id == top.c.product_id)
+        .order_by(top.c[by.value].desc(), top.c.product_id)
+    )
+    result: Result = await session.execute(stmt)
+    return [schemas.ProductSales.model_validate(row) for row in result.all()]
+
+
+async def get_promocode_usage(
+    session: AsyncSession,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[schemas.PromocodeUsage]:
+    orders_count = func.sum(DailyPromocodeUsage.orders_count).label("orders_count")
+    stmt = filter_days(
+        select(
+            DailyPromocodeUsage.promocode,
+            orders_count,
+            func.sum(DailyPromocodeUsage.revenue).label("revenue"),
+        )
+        .group_by(DailyPromocodeUsage.promocode)
+        .order_by(orders_count.desc(), DailyPromocodeUsage.promocode),
+        DailyPromocodeUsage.day,
+        date_from,
+        date_to,
+    )
+    result: Result = await session.execute(stmt)
+    return [schemas.PromocodeUsage.model_validate(row) for row in result.all()]
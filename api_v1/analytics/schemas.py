@@ -0,0 +1,51 @@
+from datetime import date, datetime
+from enum import Enum
+
+from pydantic import BaseModel, ConfigDict
+
+
+class DailyRevenue(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    day: date
+    orders_count: int
+    items_count: int
+    revenue: int
+
+
+class TopProductsBy(str, Enum):
+    units = "units"
+    revenue = "revenue"
+
+
+class ProductSales(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    product_id: int
+    name: str | None
+    units: int
+    revenue: int
+
+
+class PromocodeUsage(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    promocode: str
+    orders_count: int
+    revenue: int
+
+
+class TimeBucket(str, Enum):
+    hour = "hour"
+    day = "day"
+    week = "week"
+
+
+BUCKET_SECONDS = {
+    TimeBucket.hour: 60 * 60,
+    TimeBucket.day: 24 * 60 * 60,
+    TimeBucket.week: 7 * 24 * 60 * 60,
+}
+
+
+class SalesBucket(BaseModel):
+    start: datetime
+    units: int
+    revenue: int
@@ -0,0 +1,170 @@
+import asyncio
+from array import array
+from datetime import datetime, timezone
+from time import monotonic
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from api_v1.analytics.schemas import TopProductsBy
+from core.models import Order, OrderProductAssociation, db_helper
+from core.settings import settings
+
+
+def to_timestamp(value: datetime) -> int:
+    # created_at is stored naive; read it as UTC like SQLite's date() does
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class LineItemSnapshot:
+    """Columnar in-memory copy of order line items for ad-hoc reports.
+
+    One typed array per column, about 36 bytes per line item; reports aggregate them
+    through zero-copy NumPy views. `refresh` appends rows with an id above the last
+    one loaded, so it only sees new lines: changes to existing lines (cart updates,
+    deletes, archival) show up after the next full rebuild, at most
+    `rebuild_interval_seconds` later.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        chunk_size: int,
+        rebuild_interval_seconds: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.rebuild_interval_seconds = rebuild_interval_seconds
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.order_id = array("q")
+        self.product_id = array("q")
+        self.count = array("i")
+        self.unit_price = array("q")
+        self.created_at = array("q")
+        self.last_id = 0
+        self.built_at = monotonic()
+
+    def __len__(self) -> int:
+        return len(self.order_id)
+
+    async def refresh(self) -> int:
+        async with self._lock:
+            if monotonic() - self.built_at >= self.rebuild_interval_seconds:
+                self._reset()
+            stmt = (
+                select(
+                    OrderProductAssociation.id,
+                    OrderProductAssociation.order_id,
+                    OrderProductAssociation.product_id,
+                    OrderProductAssociation.count,
+                    OrderProductAssociation.unit_price,
+                    Order.created_at,
+                )
+                .join(Order, Order.id == OrderProductAssociation.order_id)
+                .where(OrderProductAssociation.id > self.last_id)
+                .order_by(OrderProductAssociation.id)
+                .execution_options(yield_per=self.chunk_size)
+            )
+            added = 0
+            async with self.session_factory() as session:
+                result = await session.stream(stmt)
+                async for rows in result.partitions():
+                    ids, order_ids, product_ids, counts, unit_prices, created_at = zip(*rows)
+                    self.order_id.extend(order_ids)
+                    self.product_id.extend(product_ids)
+                    self.count.extend(counts)
+                    self.unit_price.extend(unit_prices)
+                    self.created_at.extend(map(to_timestamp, created_at))
+                    self.last_id = ids[-1]
+                    added += len(ids)
+            return added
+
+    def _columns(self, since: datetime | None, until: datetime | None) -> tuple[np.ndarray, ...]:
+        # zero-copy views over the arrays; they must not outlive the call, since an array
+        # with exported buffers can't grow in the next refresh
+        product_id = np.frombuffer(self.product_id, dtype=np.int64)
+        count = np.frombuffer(self.count, dtype=np.int32).astype(np.int64)
+        revenue = count * np.frombuffer(self.unit_price, dtype=np.int64)
+        created_at = np.frombuffer(self.created_at, dtype=np.int64)
+        if since is None and until is None:
+            return product_id, count, revenue, created_at
+        mask = np.ones(len(created_at), dtype=bool)
+        if since is not None:
+            mask &= created_at >= to_timestamp(since)
+        if until is not None:
+            mask &= created_at < to_timestamp(until)
+        return product_id[mask], count[mask], revenue[mask], created_at[mask]
+
+    def _product_totals(
+        self,
+        since: datetime | None,
+        until: datetime | None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        product_id, count, revenue, _ = self._columns(since, until)
+        # product ids are dense, so a bincount slot per id beats sorting; float64 weights
+        # stay exact while a product's revenue is below 2**53
+        units = np.bincount(product_id, weights=count)
+        revenues = np.bincount(product_id, weights=revenue)
+        product_ids = np.flatnonzero(units)
+        return product_ids, units[product_ids].astype(np.int64), revenues[product_ids].astype(np.int64)
+
+    def product_totals(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> dict[int, tuple[int, int]]:
+        product_ids, units, revenue = self._product_totals(since, until)
+        return dict(zip(product_ids.tolist(), zip(units.tolist(), revenue.tolist())))
+
+    def top_products(
+        self,
+        by: TopProductsBy,
+        limit: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[tuple[int, int, int]]:
+        product_ids, units, revenue = self._product_totals(since, until)
+        score = units if by is TopProductsBy.units else revenue
+        if limit < len(score):
+            # everything tied with the limit-th score stays a candidate for the id tie-break
+            threshold = score[np.argpartition(score, -limit)[-limit]]
+            candidates = np.flatnonzero(score >= threshold)
+        else:
+            candidates = np.arange(len(score))
+        top = candidates[np.lexsort((product_ids[candidates], -score[candidates]))][:limit]
+        return list(zip(product_ids[top].tolist(), units[top].tolist(), revenue[top].tolist()))
+
+    def time_buckets(
+        self,
+        bucket_seconds: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[tuple[int, int, int]]:
+        _, count, revenue, created_at = self._columns(since, until)
+        # buckets are aligned to the epoch, weeks start on Thursday
+        buckets, bucket_index = np.unique(created_at - created_at % bucket_seconds, return_inverse=True)
+        units = np.bincount(bucket_index, weights=count, minlength=len(buckets)).astype(np.int64)
+        revenues = np.bincount(bucket_index, weights=revenue, minlength=len(buckets)).astype(np.int64)
+        return list(zip(buckets.tolist(), units.tolist(), revenues.tolist()))
+
+    def stats(self) -> dict[str, int | float]:
+        columns = (self.order_id, self.product_id, self.count, self.unit_price, self.created_at)
+        return {
+            "rows": len(self),
+            "last_id": self.last_id,
+            "bytes": sum(column.itemsize * len(column) for column in columns),
+            "age_seconds": monotonic() - self.built_at,
+        }
+
+
+line_item_snapshot = LineItemSnapshot(
+    session_factory=db_helper.read_session_factory,
+    chunk_size=settings.analytics.snapshot_chunk_size,
+    rebuild_interval_seconds=settings.analytics.snapshot_rebuild_interval_seconds,
+)
@@ -0,0 +1,91 @@
+from datetime import date, datetime, timezone
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_v1.analytics import crud
+from api_v1.analytics.schemas import (
+    BUCKET_SECONDS,
+    DailyRevenue,
+    ProductSales,
+    PromocodeUsage,
+    SalesBucket,
+    TimeBucket,
+    TopProductsBy,
+)
+from api_v1.analytics.snapshot import line_item_snapshot
+from core.models import db_helper
+from core.settings import settings
+
+router = APIRouter(tags=["Analytics"])
+
+
+@router.get("/revenue/daily/", response_model=list[DailyRevenue])
+async def get_daily_revenue(
+    date_from: Annotated[date | None, Query()] = None,
+    date_to: Annotated[date | None, Query()] = None,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> list[DailyRevenue]:
+    return await crud.get_daily_revenue(session=session, date_from=date_from, date_to=date_to)
+
+
+@router.get("/products/top/", response_model=list[ProductSales])
+async def get_top_products(
+    by: TopProductsBy = TopProductsBy.units,
+    limit: Annotated[int, Query(ge=1, le=settings.analytics.max_top_limit)] = settings.analytics.top_limit,
+    date_from: Annotated[date | None, Query()] = None,
+    date_to: Annotated[date | None, Query()] = None,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> list[ProductSales]:
+    return await crud.get_top_products(
+        session=session,
+        by=by,
+        limit=limit,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get("/promocodes/", response_model=list[PromocodeUsage])
+async def get_promocode_usage(
+    date_from: Annotated[date | None, Query()] = None,
+    date_to: Annotated[date | None, Query()] = None,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> list[PromocodeUsage]:
+    return await crud.get_promocode_usage(session=session, date_from=date_from, date_to=date_to)
+
+
+@router.get("/snapshot/")
+async def get_snapshot_stats() -> dict[str, int | float]:
+    await line_item_snapshot.refresh()
+    return line_item_snapshot.stats()
+
+
+@router.get("/snapshot/products/top/", response_model=list[ProductSales])
+async def get_snapshot_top_products(
+    by: TopProductsBy = TopProductsBy.units,
+    limit: Annotated[int, Query(ge=1, le=settings.analytics.max_top_limit)] = settings.analytics.top_limit,
+    since: Annotated[datetime | None, Query()] = None,
+    until: Annotated[datetime | None, Query()] = None,
+) -> list[ProductSales]:
+    await line_item_snapshot.refresh()
+    top = line_item_snapshot.top_products(by=by, limit=limit, since=since, until=until)
+    return [
+        ProductSales(product_id=product_id, name=None, units=units, revenue=revenue)
+        for product_id, units, revenue in top
+    ]
+
+
+@router.get("/snapshot/buckets/", response_model=list[SalesBucket])
+async def get_snapshot_buckets(
+    bucket: TimeBucket = TimeBucket.day,
+    since: Annotated[datetime | None, Query()] = None,
+    until: Annotated[datetime | None, Query()] = None,
+) -> list[SalesBucket]:
+    await line_item_snapshot.refresh()
+    buckets = line_item_snapshot.time_buckets(bucket_seconds=BUCKET_SECONDS[bucket], since=since, until=until)
+    return [
+        SalesBucket(start=datetime.fromtimestamp(start, tz=timezone.utc), units=units, revenue=revenue)
+        for start, units, revenue in buckets
+    ]
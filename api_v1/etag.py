@@ -0,0 +1,15 @@
+def make_etag(*parts: object) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def parse_etags(header: str, weak: bool = True) -> list[str]:
+    tags = [tag.strip() for tag in header.split(",") if tag.strip()]
+    if weak:
+        return [tag.removeprefix("W/") for tag in tags]
+    return [tag for tag in tags if not tag.startswith("W/")]
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison
+    tags = parse_etags(header)
+    return "*" in tags or etag in tags
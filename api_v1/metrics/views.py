@@ -0,0 +1,29 @@
+from typing import Any
+
+from fastapi import APIRouter
+
+from core.models import db_helper
+from core.query_stats import get_route_query_stats
+from core.retry import get_retry_stats
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/db/pool/")
+async def get_db_pool_stats() -> dict[str, dict[str, int | float]]:
+    return db_helper.pool_stats()
+
+
+@router.get("/db/queries/")
+async def get_db_query_stats() -> dict[str, dict[str, Any]]:
+    return get_route_query_stats()
+
+
+@router.get("/db/write-coalescer/")
+async def get_write_coalescer_stats() -> dict[str, int | float] | None:
+    return db_helper.write_coalescer.stats() if db_helper.write_coalescer else None
+
+
+@router.get("/db/retries/")
+async def get_db_retry_stats() -> dict[str, dict[str, int]]:
+    return get_retry_stats()
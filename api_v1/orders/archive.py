@@ -0,0 +1,87 @@
+"""Moves old orders with their line items into the archive tables.
+
+    python -m api_v1.orders.archive [--days N]
+
+Orders created more than `settings.orders.archive_after_days` days ago are copied
+to orders_archive / order_product_association_archive and deleted from the hot
+tables, one chunk of orders per transaction.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import Order, OrderArchive, OrderProductAssociation, OrderProductAssociationArchive, db_helper
+from core.retry import retry_on_lock
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@retry_on_lock
+async def archive_orders_chunk(session: AsyncSession, created_before: datetime, chunk_size: int) -> int:
+    # the newest order always stays hot: SQLite hands out max(id) + 1 as the next id,
+    # and an archived id must never be reused
+    stmt = (
+        select(Order.id)
+        .where(Order.created_at < created_before, Order.id < select(func.max(Order.id)).scalar_subquery())
+        .order_by(Order.created_at)
+        .limit(chunk_size)
+    )
+    order_ids = list(await session.scalars(stmt))
+    if not order_ids:
+        await session.commit()
+        return 0
+    # the orders go before their lines (enforced foreign keys are checked at commit),
+    # which also makes the totals and rollup triggers skip the deleted lines
+    await session.execute(text("PRAGMA defer_foreign_keys = ON"))
+    await session.execute(
+        insert(OrderArchive).from_select(
+            ["id", "promocode", "created_at", "total_amount", "items_count"],
+            select(Order.id, Order.promocode, Order.created_at, Order.total_amount, Order.items_count).where(
+                Order.id.in_(order_ids)
+            ),
+        )
+    )
+    lines = OrderProductAssociation
+    await session.execute(
+        insert(OrderProductAssociationArchive).from_select(
+            ["source_id", "order_id", "product_id", "count", "unit_price"],
+            select(lines.id, lines.order_id, lines.product_id, lines.count, lines.unit_price).where(
+                lines.order_id.in_(order_ids)
+            ),
+        )
+    )
+    await session.execute(delete(Order).where(Order.id.in_(order_ids)))
+    await session.execute(delete(lines).where(lines.order_id.in_(order_ids)))
+    await session.commit()
+    return len(order_ids)
+
+
+async def archive_orders(session: AsyncSession, created_before: datetime, chunk_size: int) -> int:
+    archived = 0
+    while moved := await archive_orders_chunk(session=session, created_before=created_before, chunk_size=chunk_size):
+        archived += moved
+        logger.info("Archived %d orders", archived)
+    return archived
+
+
+async def main(days: int) -> None:
+    async with db_helper.session_factory() as session:
+        await archive_orders(
+            session=session,
+            created_before=datetime.now() - timedelta(days=days),
+            chunk_size=settings.orders.archive_chunk_size,
+        )
+    await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old orders into the archive tables")
+    parser.add_argument("--days", type=int, default=settings.orders.archive_after_days)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(main(days=parser.parse_args().days))
@@ -0,0 +1,96 @@
+"""Offline check of the denormalized order totals.
+
+    python -m api_v1.orders.consistency [--fix]
+
+Recomputes total_amount and items_count from order_product_association and reports,
+or with --fix rewrites, every order whose stored values have drifted.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import Row, Subquery, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import Order, OrderProductAssociation, db_helper
+
+logger = logging.getLogger(__name__)
+
+
+def expected_totals_subquery() -> Subquery:
+    return (
+        select(
+            OrderProductAssociation.order_id,
+            func.sum(OrderProductAssociation.count * OrderProductAssociation.unit_price).label("total_amount"),
+            func.sum(OrderProductAssociation.count).label("items_count"),
+        )
+        .group_by(OrderProductAssociation.order_id)
+        .subquery()
+    )
+
+
+async def find_inconsistent_orders(session: AsyncSession) -> list[Row]:
+    expected = expected_totals_subquery()
+    expected_amount = func.coalesce(expected.c.total_amount, 0)
+    expected_count = func.coalesce(expected.c.items_count, 0)
+    stmt = (
+        select(
+            Order.id,
+            Order.total_amount,
+            expected_amount.label("expected_total_amount"),
+            Order.items_count,
+            expected_count.label("expected_items_count"),
+        )
+        .outerjoin(expected, expected.c.order_id == Order.id)
+        .where((Order.total_amount != expected_amount) | (Order.items_count != expected_count))
+        .order_by(Order.id)
+    )
+    result = await session.execute(stmt)
+    return list(result.all())
+
+
+async def fix_orders(session: AsyncSession, order_ids: list[int]) -> None:
+    association = OrderProductAssociation
+    stmt = (
+        update(Order)
+        .where(Order.id.in_(order_ids))
+        .values(
+            total_amount=select(func.coalesce(func.sum(association.count * association.unit_price), 0))
+            .where(association.order_id == Order.id)
+            .scalar_subquery(),
+            items_count=select(func.coalesce(func.sum(association.count), 0))
+            .where(association.order_id == Order.id)
+            .scalar_subquery(),
+        )
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+
+async def main(fix: bool = False) -> int:
+    async with db_helper.session_factory() as session:
+        orders = await find_inconsistent_orders(session)
+        for order in orders:
+            logger.warning(
+                "Order %d: total_amount %d != %d, items_count %d != %d",
+                order.id,
+                order.total_amount,
+                order.expected_total_amount,
+                order.items_count,
+                order.expected_items_count,
+            )
+        if orders and fix:
+            await fix_orders(session, [order.id for order in orders])
+            logger.info("Fixed %d orders", len(orders))
+        elif not orders:
+            logger.info("All order totals are consistent")
+    await db_helper.dispose()
+    return 1 if orders and not fix else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check orders.total_amount and orders.items_count")
+    parser.add_argument("--fix", action="store_true", help="rewrite the drifted totals")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    raise SystemExit(asyncio.run(main(fix=parser.parse_args().fix)))
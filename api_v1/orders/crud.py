@@ -0,0 +1,274 @@
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.sqlite import Insert as SqliteInsert, insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from api_v1.orders import schemas
+from api_v1.orders.schemas import LineItemCampaign, OrderCreate, OrderItemChange
+from core.models import Order, OrderArchive, OrderProductAssociation, OrderProductAssociationArchive, Product
+from core.retry import retry_on_lock
+
+
+class UnknownProductsError(Exception):
+    def __init__(self, product_ids: list[int]) -> None:
+        super().__init__(f"Unknown product ids: {product_ids}")
+        self.product_ids = product_ids
+
+
+@retry_on_lock
+async def create_order(session: AsyncSession, order_in: OrderCreate) -> schemas.Order:
+    # repeated lines for one product are merged, the association is unique per (order, product)
+    counts: dict[int, int] = {}
+    for item in order_in.items:
+        counts[item.product_id] = counts.get(item.product_id, 0) + item.count
+    # three statements whatever the number of lines: prices, the order, its lines
+    result = await session.execute(select(Product.id, Product.price).where(Product.id.in_(counts)))
+    prices: dict[int, int] = dict(result.tuples().all())
+    if missing := [product_id for product_id in counts if product_id not in prices]:
+        raise UnknownProductsError(missing)
+    stmt = insert(Order).values(promocode=order_in.promocode).returning(Order.id, Order.created_at)
+    order_id, created_at = (await session.execute(stmt)).one()
+    items = [
+        {"order_id": order_id, "product_id": product_id, "count": count, "unit_price": prices[product_id]}
+        for product_id, count in counts.items()
+    ]
+    await session.execute(insert(OrderProductAssociation), items)
+    await session.commit()
+    return schemas.Order(
+        id=order_id,
+        promocode=order_in.promocode,
+        created_at=created_at,
+        total_amount=sum(item["count"] * item["unit_price"] for item in items),
+        items_count=sum(item["count"] for item in items),
+        items=[schemas.OrderItem.model_validate(item) for item in items],
+    )
+
+
+async def load_order_lines(session: AsyncSession, orders: list[Order], chunk_size: int) -> None:
+    # one statement per chunk of order ids, with the products joined in, instead of selectinload
+    # whose IN batch size is not ours to choose; the lines are attached as if loaded with the orders
+    lines: dict[int, list[OrderProductAssociation]] = {order.id: [] for order in orders}
+    for start in range(0, len(orders), chunk_size):
+        end = start + chunk_size
+        stmt = (
+            select(OrderProductAssociation)
+            .options(joinedload(OrderProductAssociation.product))
+            .where(OrderProductAssociation.order_id.in_([order.id for order in orders[start:end]]))
+            .order_by(OrderProductAssociation.id)
+        )
+        for line in await session.scalars(stmt):
+            lines[line.order_id].append(line)
+    for order in orders:
+        set_committed_value(order, "products_details", lines[order.id])
+
+
+async def get_orders(
+    session: AsyncSession,
+    limit: int,
+    chunk_size: int,
+    after: tuple[datetime, int] | None = None,
+) -> list[schemas.OrderDetails]:
+    # ix_orders_created_at carries the rowid, so it serves the (created_at, id) keyset as well
+    stmt = select(Order).order_by(Order.created_at.desc(), Order.id.desc()).limit(limit)
+    if after is not None:
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < after)
+    orders = list(await session.scalars(stmt))
+    await load_order_lines(session=session, orders=orders, chunk_size=chunk_size)
+    return [schemas.OrderDetails.model_validate(order) for order in orders]
+
+
+async def get_order(session: AsyncSession, order_id: int) -> schemas.OrderDetails | None:
+    stmt = (
+        select(Order)
+        .where(Order.id == order_id)
+        .options(selectinload(Order.products_details).joinedload(OrderProductAssociation.product))
+    )
+    if order := await session.scalar(stmt):
+        return schemas.OrderDetails.model_validate(order)
+    return await get_archived_order(session=session, order_id=order_id)
+
+
+async def get_archived_order(session: AsyncSession, order_id: int) -> schemas.OrderDetails | None:
+    order = await session.get(OrderArchive, order_id)
+    if not order:
+        return None
+    lines = OrderProductAssociationArchive
+    stmt = (
+        select(lines, Product)
+        .outerjoin(Product, Product.id == lines.product_id)
+        .where(lines.order_id == order_id)
+        .order_by(lines.source_id)
+    )
+    result = await session.execute(stmt)
+    return schemas.OrderDetails(
+        id=order.id,
+        promocode=order.promocode,
+        created_at=order.created_at,
+        total_amount=order.total_amount,
+        items_count=order.items_count,
+        items=[
+            schemas.OrderItemDetails(
+                product_id=line.product_id,
+                count=line.count,
+                unit_price=line.unit_price,
+                product=product,
+            )
+            for line, product in result.tuples()
+        ],
+        archived=True,
+    )
+
+
+async def get_orders_totals(
+    session: AsyncSession,
+    limit: int,
+    after: int | None = None,
+) -> list[schemas.OrderTotals]:
+    # reads only the denormalized columns, the association table is not touched
+    stmt = select(Order).order_by(Order.id.desc()).limit(limit)
+    if after is not None:
+        stmt = stmt.where(Order.id < after)
+    orders = await session.scalars(stmt)
+    return [schemas.OrderTotals.model_validate(order) for order in orders]
+
+
+def build_upsert_item_stmt() -> SqliteInsert:
+    # bind names must not clash with the column names SQLAlchemy binds for VALUES itself
+    product_id = bindparam("p_product_id")
+    stmt = sqlite_insert(OrderProductAssociation).values(
+        order_id=bindparam("p_order_id"),
+        product_id=product_id,
+        count=bindparam("p_count"),
+        unit_price=select(Product.price).where(Product.id == product_id).scalar_subquery(),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[OrderProductAssociation.order_id, OrderProductAssociation.product_id],
+        # the unit price stays the one snapshotted when the line was first added
+        set_={"count": OrderProductAssociation.count + stmt.excluded.count},
+    )
+
+
+UPSERT_ITEM_STMT = build_upsert_item_stmt()
+# removals only touch existing lines, so they never create one (and its rollup rows) to drop it again
+DECREMENT_ITEM_STMT = (
+    update(OrderProductAssociation.__table__)
+    .where(
+        OrderProductAssociation.order_id == bindparam("p_order_id"),
+        OrderProductAssociation.product_id == bindparam("p_product_id"),
+    )
+    .values(count=OrderProductAssociation.count + bindparam("p_count"))
+)
+
+
+@retry_on_lock
+async def change_order_items(
+    session: AsyncSession,
+    order_id: int,
+    changes: list[OrderItemChange],
+) -> list[schemas.OrderItem] | None:
+    deltas: dict[int, int] = {}
+    for change in changes:
+        deltas[change.product_id] = deltas.get(change.product_id, 0) + change.count
+    if await session.scalar(select(Order.id).where(Order.id == order_id)) is None:
+        return None
+    result = await session.scalars(select(Product.id).where(Product.id.in_(deltas)))
+    if missing := set(deltas) - set(result.all()):
+        raise UnknownProductsError(sorted(missing))
+    rows = [
+        {"p_order_id": order_id, "p_product_id": product_id, "p_count": count} for product_id, count in deltas.items()
+    ]
+    if additions := [row for row in rows if row["p_count"] > 0]:
+        await session.execute(UPSERT_ITEM_STMT, additions)
+    if removals := [row for row in rows if row["p_count"] < 0]:
+        await session.execute(DECREMENT_ITEM_STMT, removals)
+    await session.execute(
+        delete(OrderProductAssociation).where(
+            OrderProductAssociation.order_id == order_id,
+            OrderProductAssociation.product_id.in_(deltas),
+            OrderProductAssociation.count <= 0,
+        )
+    )
+    stmt = (
+        select(OrderProductAssociation)
+        .where(OrderProductAssociation.order_id == order_id)
+        .order_by(OrderProductAssociation.id)
+    )
+    items = [schemas.OrderItem.model_validate(item) for item in await session.scalars(stmt)]
+    await session.commit()
+    return items
+
+
+def build_campaign_insert_stmt(campaign: LineItemCampaign, first_id: int, last_id: int) -> SqliteInsert:
+    unit_price = (
+        literal(campaign.unit_price)
+        if campaign.unit_price is not None
+        else select(Product.price).where(Product.id == campaign.product_id).scalar_subquery()
+    )
+    orders = select(
+        Order.id,
+        literal(campaign.product_id),
+        literal(campaign.count),
+        unit_price,
+    ).where(Order.id.between(first_id, last_id))
+    if campaign.promocode is not None:
+        orders = orders.where(Order.promocode == campaign.promocode)
+    if campaign.created_from is not None:
+        orders = orders.where(Order.created_at >= campaign.created_from)
+    if campaign.created_to is not None:
+        orders = orders.where(Order.created_at < campaign.created_to)
+    return (
+        sqlite_insert(OrderProductAssociation).from_select(["order_id", "product_id", "count", "unit_price"], orders)
+        # orders that already have the product keep their line as it is
+        .on_conflict_do_nothing(index_elements=["order_id", "product_id"])
+    )
+
+
+@retry_on_lock
+async def add_line_item_to_orders_chunk(
+    session: AsyncSession,
+    campaign: LineItemCampaign,
+    first_id: int,
+    last_id: int,
+) -> int:
+    result = await session.execute(build_campaign_insert_stmt(campaign, first_id, last_id))
+    await session.commit()
+    return result.rowcount
+
+
+async def add_line_item_to_orders(
+    session: AsyncSession,
+    campaign: LineItemCampaign,
+    chunk_size: int,
+    after_id: int = 0,
+    on_chunk: Callable[[int, int, int], Awaitable[None]] | None = None,
+) -> int:
+    """Add one line item to every matching order, a range of order ids per transaction.
+
+    Each chunk is a single INSERT ... SELECT ... ON CONFLICT DO NOTHING committed on
+    its own, so the write lock is held for one chunk at a time. Returns the number of
+    lines inserted; `on_chunk(last_id, max_id, inserted)` is awaited after each chunk.
+    """
+    max_id = await session.scalar(select(func.max(Order.id)))
+    await session.commit()
+    inserted = 0
+    first_id = after_id + 1
+    while max_id is not None and first_id <= max_id:
+        last_id = first_id + chunk_size - 1
+        inserted += await add_line_item_to_orders_chunk(
+            session=session,
+            campaign=campaign,
+            first_id=first_id,
+            last_id=last_id,
+        )
+        if on_chunk is not None:
+            await on_chunk(min(last_id, max_id), max_id, inserted)
+        first_id = last_id + 1
+    return inserted
+
+
+async def product_exists(session: AsyncSession, product_id: int) -> bool:
+    return await session.scalar(select(Product.id).where(Product.id == product_id)) is not None
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from uuid import uuid4
+
+from api_v1.orders import crud
+from api_v1.orders.schemas import JobStatus, LineItemCampaign, LineItemJob
+from core.models import db_helper
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# process-local: a job and its status live in the worker that started it
+line_item_jobs: OrderedDict[str, LineItemJob] = OrderedDict()
+running_tasks: set[asyncio.Task] = set()
+
+
+async def run_line_item_job(job: LineItemJob) -> None:
+    async def on_chunk(last_id: int, max_id: int, inserted: int) -> None:
+        job.last_order_id, job.max_order_id, job.inserted = last_id, max_id, inserted
+
+    job.status = JobStatus.running
+    try:
+        async with db_helper.session_factory() as session:
+            await crud.add_line_item_to_orders(
+                session=session,
+                campaign=job.campaign,
+                chunk_size=settings.orders.campaign_chunk_size,
+                on_chunk=on_chunk,
+            )
+    except Exception as e:
+        logger.exception("Line item job %s failed after order %d", job.id, job.last_order_id)
+        job.status = JobStatus.failed
+        job.error = str(e)
+    else:
+        job.status = JobStatus.done
+
+
+def start_line_item_job(campaign: LineItemCampaign) -> LineItemJob:
+    job = LineItemJob(id=uuid4().hex, campaign=campaign)
+    line_item_jobs[job.id] = job
+    while len(line_item_jobs) > settings.orders.jobs_history:
+        line_item_jobs.popitem(last=False)
+    task = asyncio.create_task(run_line_item_job(job))
+    running_tasks.add(task)
+    task.add_done_callback(running_tasks.discard)
+    return job
@@ -0,0 +1,82 @@
+from datetime import datetime
+from enum import Enum
+from typing import Annotated
+
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+
+from api_v1.products.schemas import Product
+
+
+class OrderItemCreate(BaseModel):
+    product_id: int
+    count: Annotated[int, Field(ge=1)] = 1
+
+
+class OrderCreate(BaseModel):
+    promocode: str | None = None
+    items: Annotated[list[OrderItemCreate], Field(min_length=1)]
+
+
+class OrderItemChange(BaseModel):
+    product_id: int
+    # added to the line's count; negative removes, the line is dropped once it reaches zero
+    count: int
+
+
+class OrderItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    product_id: int
+    count: int
+    unit_price: int
+
+
+class OrderTotals(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    promocode: str | None
+    created_at: datetime
+    total_amount: int
+    items_count: int
+
+
+class Order(OrderTotals):
+    items: list[OrderItem]
+
+
+class OrderItemDetails(OrderItem):
+    # None for an archived line whose product has since been deleted
+    product: Product | None
+
+
+class OrderDetails(OrderTotals):
+    items: list[OrderItemDetails] = Field(validation_alias=AliasChoices("items", "products_details"))
+    archived: bool = False
+
+
+class LineItemCampaign(BaseModel):
+    product_id: int
+    count: Annotated[int, Field(ge=1)] = 1
+    # None snapshots the product's current price
+    unit_price: Annotated[int | None, Field(ge=0)] = None
+    # which orders get the line, every order when left empty
+    promocode: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class LineItemJob(BaseModel):
+    id: str
+    campaign: LineItemCampaign
+    status: JobStatus = JobStatus.pending
+    # orders with an id up to here have been processed
+    last_order_id: int = 0
+    max_order_id: int | None = None
+    inserted: int = 0
+    error: str | None = None
@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_v1.orders import crud
+from api_v1.orders.jobs import line_item_jobs, start_line_item_job
+from api_v1.orders.schemas import (
+    LineItemCampaign,
+    LineItemJob,
+    Order,
+    OrderCreate,
+    OrderDetails,
+    OrderItem,
+    OrderItemChange,
+    OrderTotals,
+)
+from api_v1.pagination import Page, decode_cursor, encode_cursor
+from core.models import db_helper
+from core.settings import settings
+
+router = APIRouter(tags=["Orders"])
+
+
+def too_many_items() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"At most {settings.orders.max_items} items per request",
+    )
+
+
+def order_not_found(order_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Order {order_id} not found",
+    )
+
+
+def products_not_found(product_ids: list[int]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"Products not found: {', '.join(map(str, product_ids))}",
+    )
+
+
+@router.get("/", response_model=Page[OrderDetails])
+async def get_orders(
+    limit: Annotated[int, Query(ge=1, le=settings.orders.max_page_size)] = settings.orders.page_size,
+    after: Annotated[str | None, Query(description="Opaque cursor from the previous page")] = None,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> Page[OrderDetails]:
+    after_key = None
+    if after:
+        created_at, order_id = decode_cursor(after, str, int)
+        try:
+            after_key = (datetime.fromisoformat(created_at), order_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid cursor: {after!r}",
+            )
+    orders = await crud.get_orders(
+        session=session,
+        limit=limit + 1,
+        chunk_size=settings.orders.eager_chunk_size,
+        after=after_key,
+    )
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].created_at.isoformat(), orders[-1].id)
+    return Page(items=orders, next=next_cursor)
+
+
+@router.get("/totals/", response_model=Page[OrderTotals])
+async def get_orders_totals(
+    limit: Annotated[int, Query(ge=1, le=settings.orders.max_page_size)] = settings.orders.page_size,
+    after: Annotated[str | None, Query(description="Opaque cursor from the previous page")] = None,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> Page[OrderTotals]:
+    after_id = decode_cursor(after, int)[0] if after else None
+    orders = await crud.get_orders_totals(session=session, limit=limit + 1, after=after_id)
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].id)
+    return Page(items=orders, next=next_cursor)
+
+
+@router.post(
+    "/",
+    response_model=Order,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_order(
+    order_in: OrderCreate,
+    session: AsyncSession = Depends(db_helper.session_dependency),
+) -> Order:
+    if len(order_in.items) > settings.orders.max_items:
+        raise too_many_items()
+    try:
+        return await crud.create_order(session=session, order_in=order_in)
+    except crud.UnknownProductsError as e:
+        raise products_not_found(e.product_ids)
+
+
+@router.post("/{order_id}/items/", response_model=list[OrderItem])
+async def change_order_items(
+    order_id: Annotated[int, Path],
+    changes: Annotated[list[OrderItemChange], Body(min_length=1)],
+    session: AsyncSession = Depends(db_helper.session_dependency),
+) -> list[OrderItem]:
+    if len(changes) > settings.orders.max_items:
+        raise too_many_items()
+    try:
+        items = await crud.change_order_items(session=session, order_id=order_id, changes=changes)
+    except crud.UnknownProductsError as e:
+        raise products_not_found(e.product_ids)
+    if items is None:
+        raise order_not_found(order_id)
+    return items
+
+
+@router.post(
+    "/line-items/jobs/",
+    response_model=LineItemJob,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_line_item_job(
+    campaign: LineItemCampaign,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> LineItemJob:
+    if not await crud.product_exists(session=session, product_id=campaign.product_id):
+        raise products_not_found([campaign.product_id])
+    return start_line_item_job(campaign)
+
+
+@router.get("/line-items/jobs/{job_id}/", response_model=LineItemJob)
+async def get_line_item_job(job_id: str) -> LineItemJob:
+    if job := line_item_jobs.get(job_id):
+        return job
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Job {job_id} not found",
+    )
+
+
+@router.get("/{order_id}/", response_model=OrderDetails)
+async def get_order(
+    order_id: Annotated[int, Path],
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> OrderDetails:
+    if order := await crud.get_order(session=session, order_id=order_id):
+        return order
+    raise order_not_found(order_id)
@@ -0,0 +1,85 @@
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+from api_v1.products.schemas import ProductBulkError, ProductCreate
+from core.settings import settings
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+
+
+def _invalid_json(index: int, error: ValueError) -> ProductBulkError:
+    return ProductBulkError(
+        index=index,
+        errors=[{"type": "json_invalid", "loc": [], "msg": f"Invalid JSON: {error}"}],
+    )
+
+
+def parse_ndjson_items(body: bytes) -> tuple[list[Any], list[ProductBulkError]]:
+    # a malformed line only fails its own item
+    items: list[Any] = []
+    errors: list[ProductBulkError] = []
+    lines = [line for line in body.splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(None)
+            errors.append(_invalid_json(index, e))
+    return items, errors
+
+
+def parse_json_items(body: bytes) -> list[Any]:
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid JSON body: {e}",
+        )
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of products",
+        )
+    return items
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> tuple[list[Any], list[ProductBulkError]]:
+    if content_type.split(";")[0].strip() in NDJSON_MEDIA_TYPES:
+        items, errors = parse_ndjson_items(body)
+    else:
+        items, errors = parse_json_items(body), []
+    if len(items) > settings.products.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.products.bulk_max_items} products per request",
+        )
+    return items, errors
+
+
+def validate_bulk_items(
+    items: list[Any],
+    errors: list[ProductBulkError],
+) -> tuple[list[int], list[ProductCreate], list[ProductBulkError]]:
+    failed = {error.index for error in errors}
+    indexes: list[int] = []
+    products_in: list[ProductCreate] = []
+    for index, item in enumerate(items):
+        if index in failed:
+            continue
+        try:
+            products_in.append(ProductCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append(
+                ProductBulkError(
+                    index=index,
+                    errors=e.errors(include_url=False, include_context=False, include_input=False),
+                )
+            )
+            continue
+        indexes.append(index)
+    errors.sort(key=lambda error: error.index)
+    return indexes, products_in, errors
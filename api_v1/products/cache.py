@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from time import monotonic
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_v1.products.schemas import Product
+from core.models import Product as ProductModel, TableVersion
+from core.settings import settings
+
+
+class ProductCache:
+    """Process-wide LRU cache of product schemas with a TTL per entry."""
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        sync_interval_seconds: float | None = None,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.sync_interval_seconds = sync_interval_seconds
+        self._entries: OrderedDict[int, tuple[float, Product]] = OrderedDict()
+        self._version: int | None = None
+        self._synced_at = 0.0
+        # Write generations guard fills after a miss: a row loaded before a later
+        # write must not overwrite what that write put in (or took out of) the cache.
+        self._generation = 0
+        self._writes: OrderedDict[int, int] = OrderedDict()
+        self._writes_floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_fills = 0
+
+    def get(self, product_id: int) -> Product | None:
+        entry = self._entries.get(product_id)
+        if entry is None or entry[0] < monotonic():
+            if entry is not None:
+                del self._entries[product_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(product_id)
+        self.hits += 1
+        return entry[1]
+
+    def fill_token(self) -> int:
+        """Taken before loading a product from the database, passed back to `fill`."""
+        return self._generation
+
+    def fill(self, product: Product, token: int) -> None:
+        if token < self._writes_floor or self._writes.get(product.id, 0) > token:
+            self.stale_fills += 1
+            return
+        self._store(product)
+
+    def set(self, product: Product) -> None:
+        self._record_write(product.id)
+        self._store(product)
+
+    def _record_write(self, product_id: int) -> None:
+        self._generation += 1
+        self._writes[product_id] = self._generation
+        self._writes.move_to_end(product_id)
+        while len(self._writes) > self.max_size:
+            # forgetting a write means refusing every fill that started before it
+            _, self._writes_floor = self._writes.popitem(last=False)
+
+    def _store(self, product: Product) -> None:
+        self._entries[product.id] = (monotonic() + self.ttl_seconds, product)
+        self._entries.move_to_end(product.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, product_id: int) -> None:
+        self._record_write(product_id)
+        self._entries.pop(product_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+        self._writes.clear()
+        self._writes_floor = self._generation
+
+    async def sync(self, session: AsyncSession) -> None:
+        # Other workers keep their own copies; the products triggers bump
+        # table_versions on every write, so a changed version drops ours.
+        if self.sync_interval_seconds is None or monotonic() - self._synced_at < self.sync_interval_seconds:
+            return
+        stmt = select(TableVersion.version).where(TableVersion.name == ProductModel.__tablename__)
+        version = await session.scalar(stmt)
+        self._synced_at = monotonic()
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_fills": self.stale_fills,
+        }
+
+
+product_cache = ProductCache(
+    max_size=settings.products.cache.max_size,
+    ttl_seconds=settings.products.cache.ttl_seconds,
+    sync_interval_seconds=settings.products.cache.sync_interval_seconds,
+)
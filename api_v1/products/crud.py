@@ -1,45 +1,327 @@
-from sqlalchemy import select
+import re
+import sys
+from collections.abc import AsyncIterator, Sequence
+
+from sqlalchemy import Row, Select, delete, insert, select, text, tuple_, update
 from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.expression import UnaryExpression
+from sqlalchemy.sql.operators import custom_op
+
+from api_v1.products import schemas
+from api_v1.products.cache import product_cache
+from api_v1.products.schemas import ProductCreate, ProductSort, ProductUpdate, ProductUpdatePartial
+from core.models import Product, TableVersion
+from core.retry import retry_on_lock
+from core.write_coalescer import WriteCoalescer
+
+SORT_KEYS = {
+    ProductSort.id: (Product.id, False),
+    ProductSort.name: (Product.name, False),
+    ProductSort.price: (Product.price, False),
+    ProductSort.price_desc: (Product.price, True),
+}
+
+
+def name_prefix_upper_bound(prefix: str) -> str | None:
+    # the smallest string above every name starting with prefix; None when there is none
+    # (the prefix is all U+10FFFF), and surrogates are skipped since they can't be encoded
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    successor = ord(prefix[-1]) + 1
+    if 0xD800 <= successor <= 0xDFFF:
+        successor = 0xE000
+    return prefix[:-1] + chr(successor)
+
+
+def filtered_column(
+    price_min: int | None = None,
+    price_max: int | None = None,
+    name_prefix: str | None = None,
+) -> InstrumentedAttribute | None:
+    if name_prefix:
+        return Product.name
+    if price_min is not None or price_max is not None:
+        return Product.price
+    return None
+
+
+def unindexed(column: InstrumentedAttribute) -> UnaryExpression:
+    # "+column" keeps SQLite from walking the column's index to satisfy ORDER BY
+    return UnaryExpression(column.expression, operator=custom_op("+"), type_=column.type)
+
+
+def filter_products(
+    stmt: Select,
+    price_min: int | None = None,
+    price_max: int | None = None,
+    name_prefix: str | None = None,
+) -> Select:
+    if price_min is not None:
+        stmt = stmt.where(Product.price >= price_min)
+    if price_max is not None:
+        stmt = stmt.where(Product.price <= price_max)
+    if name_prefix:
+        # a range instead of LIKE, so the name index is usable whatever the collation pragmas are
+        stmt = stmt.where(Product.name >= name_prefix)
+        if (upper_bound := name_prefix_upper_bound(name_prefix)) is not None:
+            stmt = stmt.where(Product.name < upper_bound)
+    return stmt
 
-from api_v1.products.schemas import ProductCreate, ProductUpdate, ProductUpdatePartial
-from core.models import Product
 
+PRODUCT_COLUMNS = (Product.id, Product.name, Product.price, Product.description, Product.version)
 
-async def get_products(session: AsyncSession) -> list[Product]:
-    stmt = select(Product).order_by(Product.id)
+
+def sort_key(product: Row, sort: ProductSort) -> tuple[int | str, int]:
+    column, _ = SORT_KEYS[sort]
+    return getattr(product, column.key), product.id
+
+
+def build_products_stmt(
+    limit: int,
+    sort: ProductSort = ProductSort.id,
+    after: tuple[int | str, int] | None = None,
+    price_min: int | None = None,
+    price_max: int | None = None,
+    name_prefix: str | None = None,
+    fields: Sequence[str] | None = None,
+) -> Select:
+    column, descending = SORT_KEYS[sort]
+    columns = PRODUCT_COLUMNS
+    if fields:
+        # the keyset columns are always needed to build the next cursor
+        names = {*fields, column.key, Product.id.key}
+        columns = tuple(product_column for product_column in PRODUCT_COLUMNS if product_column.key in names)
+    stmt = filter_products(
+        select(*columns),
+        price_min=price_min,
+        price_max=price_max,
+        name_prefix=name_prefix,
+    )
+    filtered = filtered_column(price_min=price_min, price_max=price_max, name_prefix=name_prefix)
+    stmt = order_products(stmt, sort=sort, after=after, use_sort_index=filtered is None or filtered is column)
+    return stmt.limit(limit)
+
+
+def order_products(
+    stmt: Select,
+    sort: ProductSort,
+    after: tuple[int | str, int] | None = None,
+    use_sort_index: bool = True,
+) -> Select:
+    # Without statistics SQLite prefers walking the sort index and filtering as it goes, which
+    # reads the whole table when few rows match. When another column is filtered, its index
+    # range plus a sort of the matches is the bounded plan, so the sort index is ruled out.
+    column, descending = SORT_KEYS[sort]
+    keyset = (Product.id,) if sort is ProductSort.id else (column, Product.id)
+    if after is not None:
+        key, after_key = (Product.id, after[1]) if sort is ProductSort.id else (tuple_(*keyset), after)
+        stmt = stmt.where(key < after_key if descending else key > after_key)
+    order_by = keyset if use_sort_index else tuple(unindexed(key_column) for key_column in keyset)
+    if descending:
+        order_by = tuple(key_column.desc() for key_column in order_by)
+    return stmt.order_by(*order_by)
+
+
+async def get_products(
+    session: AsyncSession,
+    limit: int,
+    sort: ProductSort = ProductSort.id,
+    after: tuple[int | str, int] | None = None,
+    price_min: int | None = None,
+    price_max: int | None = None,
+    name_prefix: str | None = None,
+    fields: Sequence[str] | None = None,
+) -> list[Row]:
+    stmt = build_products_stmt(
+        limit=limit,
+        sort=sort,
+        after=after,
+        price_min=price_min,
+        price_max=price_max,
+        name_prefix=name_prefix,
+        fields=fields,
+    )
     result: Result = await session.execute(stmt)
-    products = result.scalars().all()
-    return list(products)
+    return list(result.all())
+
+
+async def stream_products(session: AsyncSession, chunk_size: int) -> AsyncIterator[Sequence[Row]]:
+    stmt = (
+        select(Product.id, Product.name, Product.price, Product.description)
+        .order_by(Product.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await session.stream(stmt)
+    async for rows in result.partitions():
+        yield rows
 
 
-async def get_product(session: AsyncSession, product_id: int) -> Product | None:
-    return await session.get(Product, product_id)
+SEARCH_STMT = """
+    SELECT products.id, products.name, products.price, products.description, products.version,
+           highlight(products_fts, 0, :mark_open, :mark_close) AS name_highlight,
+           snippet(products_fts, 1, :mark_open, :mark_close, '…', 24) AS description_highlight,
+           bm25(products_fts) AS rank
+    FROM products_fts
+    JOIN products ON products.id = products_fts.rowid
+    WHERE products_fts MATCH :query {after}
+    ORDER BY rank, products.id
+    LIMIT :limit
+"""
+SEARCH_AFTER = "AND (bm25(products_fts), products.id) > (:after_rank, :after_id)"
 
 
-async def create_product(session: AsyncSession, product_in: ProductCreate) -> Product:
-    product = Product(**product_in.model_dump())
-    session.add(product)
+def build_match_query(q: str) -> str:
+    # every word becomes a quoted prefix term, so user input can't inject FTS5 syntax
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", q))
+
+
+async def search_products(
+    session: AsyncSession,
+    q: str,
+    limit: int,
+    after: tuple[float, int] | None = None,
+    mark_open: str = "<mark>",
+    mark_close: str = "</mark>",
+) -> list[Row]:
+    query = build_match_query(q)
+    if not query:
+        return []
+    params = {"query": query, "limit": limit, "mark_open": mark_open, "mark_close": mark_close}
+    if after is not None:
+        params.update(after_rank=after[0], after_id=after[1])
+    stmt = text(SEARCH_STMT.format(after=SEARCH_AFTER if after is not None else ""))
+    result: Result = await session.execute(stmt, params)
+    return list(result.all())
+
+
+async def get_product(session: AsyncSession, product_id: int) -> schemas.Product | None:
+    await product_cache.sync(session)
+    if cached := product_cache.get(product_id):
+        return cached
+    token = product_cache.fill_token()
+    product = await session.get(Product, product_id)
+    if not product:
+        return None
+    cached = schemas.Product.model_validate(product)
+    product_cache.fill(cached, token)
+    return cached
+
+
+async def get_products_by_ids(
+    session: AsyncSession,
+    product_ids: Sequence[int],
+    chunk_size: int,
+) -> dict[int, schemas.Product]:
+    await product_cache.sync(session)
+    products: dict[int, schemas.Product] = {}
+    missing: list[int] = []
+    for product_id in product_ids:
+        if cached := product_cache.get(product_id):
+            products[product_id] = cached
+        else:
+            missing.append(product_id)
+    token = product_cache.fill_token()
+    for start in range(0, len(missing), chunk_size):
+        end = start + chunk_size
+        stmt = select(Product).where(Product.id.in_(missing[start:end]))
+        for product in await session.scalars(stmt):
+            products[product.id] = schemas.Product.model_validate(product)
+            product_cache.fill(products[product.id], token)
+    return products
+
+
+async def get_product_version(session: AsyncSession, product_id: int) -> int | None:
+    await product_cache.sync(session)
+    if cached := product_cache.get(product_id):
+        return cached.version
+    return await session.scalar(select(Product.version).where(Product.id == product_id))
+
+
+async def get_products_version(session: AsyncSession) -> int | None:
+    return await session.scalar(select(TableVersion.version).where(TableVersion.name == Product.__tablename__))
+
+
+async def insert_product(session: AsyncSession, product_in: ProductCreate) -> schemas.Product:
+    stmt = insert(Product).values(**product_in.model_dump()).returning(Product)
+    product: Product = await session.scalar(stmt)
+    return schemas.Product.model_validate(product)
+
+
+@retry_on_lock
+async def create_product(
+    session: AsyncSession,
+    product_in: ProductCreate,
+    coalescer: WriteCoalescer | None = None,
+) -> schemas.Product:
+    if coalescer is not None:
+        created = await coalescer.submit(insert_product, product_in)
+    else:
+        created = await insert_product(session=session, product_in=product_in)
+        await session.commit()
+    product_cache.set(created)
+    return created
+
+
+@retry_on_lock
+async def create_products_bulk(
+    session: AsyncSession,
+    products_in: list[ProductCreate],
+    batch_size: int,
+) -> list[int]:
+    rows = [product_in.model_dump() for product_in in products_in]
+    ids: list[int] = []
+    for start in range(0, len(rows), batch_size):
+        end = start + batch_size
+        stmt = insert(Product).values(rows[start:end]).returning(Product.id)
+        result: Result = await session.execute(stmt)
+        # SQLite hands out ascending rowids in VALUES order within one statement,
+        # but RETURNING itself does not promise any order.
+        ids.extend(sorted(result.scalars().all()))
     await session.commit()
-    await session.refresh(product)
-    return product
+    return ids
 
 
+@retry_on_lock
 async def update_product(
     session: AsyncSession,
-    product: Product,
+    product_id: int,
     product_update: ProductUpdate | ProductUpdatePartial,
     partial: bool = False,
-) -> Product:
-    for name, value in product_update.model_dump(exclude_unset=partial).items():
-        setattr(product, name, value)
+    expected_versions: list[int] | None = None,
+) -> schemas.Product | None:
+    values = product_update.model_dump(exclude_unset=partial)
+    if not values:
+        product = await get_product(session=session, product_id=product_id)
+        if product and expected_versions is not None and product.version not in expected_versions:
+            return None
+        return product
+    stmt = (
+        update(Product)
+        .where(Product.id == product_id)
+        .values(**values, version=Product.version + 1)
+        .returning(Product)
+    )
+    if expected_versions is not None:
+        stmt = stmt.where(Product.version.in_(expected_versions))
+    product: Product | None = await session.scalar(stmt)
     await session.commit()
-    return product
+    if not product:
+        return None
+    updated = schemas.Product.model_validate(product)
+    product_cache.set(updated)
+    return updated
 
 
+@retry_on_lock
 async def delete_product(
     session: AsyncSession,
-    product: Product,
-) -> None:
-    await session.delete(product)
+    product_id: int,
+) -> bool:
+    stmt = delete(Product).where(Product.id == product_id).returning(Product.id)
+    deleted_id: int | None = await session.scalar(stmt)
     await session.commit()
+    product_cache.invalidate(product_id)
+    return deleted_id is not None
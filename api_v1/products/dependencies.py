@@ -1,20 +1,104 @@
+import hashlib
 from typing import Annotated
+from urllib.parse import urlencode
 
-from fastapi import Depends, HTTPException, Path, status
+from fastapi import Depends, Header, HTTPException, Path, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api_v1.etag import etag_matches, make_etag, parse_etags
 from api_v1.products import crud
-from core.models import Product, db_helper
+from api_v1.products.schemas import Product
+from core.models import db_helper
+
+PRODUCT_FIELDS = tuple(Product.model_fields)
+
+
+def product_not_found(product_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Product {product_id} not found",
+    )
+
+
+def not_modified(etag: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag},
+    )
+
+
+def product_etag(product_id: int, version: int, fields: tuple[str, ...] | None = None) -> str:
+    # a sparse representation is a different entity, but still carries "<id>-<version>" for If-Match
+    return make_etag(product_id, version, *(fields or ()))
+
+
+def if_match_versions(if_match: str | None, product_id: int) -> list[int] | None:
+    if if_match is None:
+        return None
+    tags = parse_etags(if_match, weak=False)
+    if "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        tag_product_id, _, version = tag.strip('"').partition("-")
+        version = version.split("-", 1)[0]
+        if tag_product_id == str(product_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+def get_product_fields(
+    fields: Annotated[
+        str | None,
+        Query(description=f"Comma-separated subset of: {', '.join(PRODUCT_FIELDS)}"),
+    ] = None,
+) -> tuple[str, ...] | None:
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested or not requested.issubset(PRODUCT_FIELDS):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid fields {fields!r}, expected a subset of: {', '.join(PRODUCT_FIELDS)}",
+        )
+    # canonical order, so every spelling of a field set shares one cached model
+    return tuple(name for name in PRODUCT_FIELDS if name in requested)
 
 
 async def get_product_by_id(
     product_id: Annotated[int, Path],
-    session: AsyncSession = Depends(db_helper.get_scoped_session),
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
 ) -> Product:
     product = await crud.get_product(session=session, product_id=product_id)
     if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Product {product_id} not found",
-        )
+        raise product_not_found(product_id)
     return product
+
+
+async def check_product_not_modified(
+    product_id: Annotated[int, Path],
+    if_none_match: Annotated[str | None, Header()] = None,
+    fields: tuple[str, ...] | None = Depends(get_product_fields),
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> None:
+    if not if_none_match:
+        return
+    version = await crud.get_product_version(session=session, product_id=product_id)
+    if version is None:
+        return
+    etag = product_etag(product_id, version, fields)
+    if etag_matches(if_none_match, etag):
+        raise not_modified(etag)
+
+
+async def get_products_etag(
+    request: Request,
+    if_none_match: Annotated[str | None, Header()] = None,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> str:
+    version = await crud.get_products_version(session=session)
+    query = urlencode(sorted(request.query_params.multi_items()))
+    etag = make_etag("products", version, hashlib.blake2b(query.encode("utf-8"), digest_size=8).hexdigest())
+    if if_none_match and etag_matches(if_none_match, etag):
+        raise not_modified(etag)
+    return etag
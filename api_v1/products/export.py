@@ -0,0 +1,37 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+
+from sqlalchemy import Row
+
+from api_v1.products import crud
+from api_v1.products.schemas import ExportFormat
+from core.models import db_helper
+from core.settings import settings
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+CSV_HEADER = ("id", "name", "price", "description")
+
+
+def rows_to_ndjson(rows: Sequence[Row]) -> str:
+    return "".join(json.dumps(row._asdict(), ensure_ascii=False) + "\n" for row in rows)
+
+
+def rows_to_csv(rows: Sequence[Row]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def iter_products_export(export_format: ExportFormat) -> AsyncIterator[str]:
+    # The stream outlives the request dependencies, so it owns its session.
+    if export_format is ExportFormat.csv:
+        yield rows_to_csv([CSV_HEADER])
+    encode = rows_to_csv if export_format is ExportFormat.csv else rows_to_ndjson
+    async with db_helper.read_session_factory() as session:
+        async for rows in crud.stream_products(session=session, chunk_size=settings.products.export_chunk_size):
+            yield encode(rows)
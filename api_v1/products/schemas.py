@@ -1,4 +1,9 @@
-from pydantic import BaseModel, ConfigDict
+from enum import Enum
+from functools import cache
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing_extensions import TypedDict
 
 
 class ProductBase(BaseModel):
@@ -24,3 +29,86 @@ class ProductUpdatePartial(ProductBase):
 class Product(ProductBase):
     model_config = ConfigDict(from_attributes=True)
     id: int
+    version: int
+
+
+class ProductSort(str, Enum):
+    id = "id"
+    name = "name"
+    price = "price"
+    price_desc = "-price"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ProductBatch(BaseModel):
+    items: list[Product]
+    missing: list[int]
+
+
+class ProductBulkError(BaseModel):
+    index: int
+    errors: list[dict[str, Any]]
+
+
+class ProductBulkResult(BaseModel):
+    # aligned with the request items, None where the item failed validation
+    ids: list[int | None]
+    errors: list[ProductBulkError]
+
+
+class ProductSearchHit(Product):
+    name_highlight: str
+    description_highlight: str
+    rank: float
+
+
+# Plain column rows for the list endpoints: serialized straight to JSON bytes,
+# without ORM hydration or model validation.
+class ProductRow(TypedDict):
+    id: int
+    name: str
+    price: int
+    description: str
+    version: int
+
+
+class ProductRowsPage(TypedDict):
+    items: list[ProductRow]
+    next: str | None
+
+
+class ProductSearchRow(ProductRow):
+    name_highlight: str
+    description_highlight: str
+    rank: float
+
+
+class ProductSearchRowsPage(TypedDict):
+    items: list[ProductSearchRow]
+    next: str | None
+
+
+product_rows_page_adapter = TypeAdapter(ProductRowsPage)
+product_search_rows_page_adapter = TypeAdapter(ProductSearchRowsPage)
+
+
+@cache
+def product_fields_row(fields: tuple[str, ...]) -> type[TypedDict]:
+    annotations = {name: Product.model_fields[name].annotation for name in fields}
+    return TypedDict(f"ProductRow_{'_'.join(fields)}", annotations)
+
+
+@cache
+def product_fields_adapter(fields: tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(product_fields_row(fields))
+
+
+@cache
+def product_fields_page_adapter(fields: tuple[str, ...]) -> TypeAdapter:
+    row = product_fields_row(fields)
+    page = TypedDict(f"ProductRowsPage_{'_'.join(fields)}", {"items": list[row], "next": str | None})
+    return TypeAdapter(page)
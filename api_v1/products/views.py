@@ -1,17 +1,149 @@
-from fastapi import APIRouter, Depends, status
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api_v1.pagination import Page, decode_cursor, encode_cursor
 from api_v1.products import crud
-from api_v1.products.dependencies import get_product_by_id
-from api_v1.products.schemas import Product, ProductCreate, ProductUpdate, ProductUpdatePartial
+from api_v1.products.bulk import parse_bulk_body, validate_bulk_items
+from api_v1.products.cache import product_cache
+from api_v1.products.dependencies import (
+    check_product_not_modified,
+    get_product_by_id,
+    get_product_fields,
+    get_products_etag,
+    if_match_versions,
+    product_etag,
+    product_not_found,
+)
+from api_v1.products.export import MEDIA_TYPES, iter_products_export
+from api_v1.products.schemas import (
+    ExportFormat,
+    Product,
+    ProductBatch,
+    ProductBulkResult,
+    ProductCreate,
+    ProductRowsPage,
+    ProductSearchHit,
+    ProductSearchRowsPage,
+    ProductSort,
+    ProductUpdate,
+    ProductUpdatePartial,
+    product_fields_adapter,
+    product_fields_page_adapter,
+    product_rows_page_adapter,
+    product_search_rows_page_adapter,
+)
+from api_v1.responses import RawJSONResponse, json_response
 from core.models import db_helper
+from core.settings import settings
 
 router = APIRouter(tags=["Products"])
 
 
-@router.get("/", response_model=list[Product])
-async def get_products(session: AsyncSession = Depends(db_helper.get_scoped_session)) -> list[Product]:
-    return await crud.get_products(session=session)
+@router.get("/", response_model=Page[Product])
+@json_response(product_rows_page_adapter)
+async def get_products(
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=settings.products.max_page_size)] = settings.products.page_size,
+    after: Annotated[str | None, Query(description="Opaque cursor from the previous page")] = None,
+    sort: ProductSort = ProductSort.id,
+    price_min: Annotated[int | None, Query()] = None,
+    price_max: Annotated[int | None, Query()] = None,
+    name_prefix: Annotated[str | None, Query(min_length=1)] = None,
+    fields: tuple[str, ...] | None = Depends(get_product_fields),
+    etag: str = Depends(get_products_etag),
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> ProductRowsPage | RawJSONResponse:
+    response.headers["ETag"] = etag
+    after_key = None
+    if after:
+        cursor_sort, *after_key = decode_cursor(after, str, str if sort is ProductSort.name else int, int)
+        if cursor_sort != sort.value:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cursor was issued for sort={cursor_sort!r}",
+            )
+    # one extra row tells us whether there is a next page without a COUNT(*)
+    products = await crud.get_products(
+        session=session,
+        limit=limit + 1,
+        sort=sort,
+        after=tuple(after_key) if after_key else None,
+        price_min=price_min,
+        price_max=price_max,
+        name_prefix=name_prefix,
+        fields=fields,
+    )
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor(sort.value, *crud.sort_key(products[-1], sort))
+    if fields:
+        page = {
+            "items": [{name: getattr(product, name) for name in fields} for product in products],
+            "next": next_cursor,
+        }
+        return RawJSONResponse(product_fields_page_adapter(fields).dump_json(page), headers={"ETag": etag})
+    return {"items": [product._asdict() for product in products], "next": next_cursor}
+
+
+@router.get("/search/", response_model=Page[ProductSearchHit])
+@json_response(product_search_rows_page_adapter)
+async def search_products(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=settings.products.max_page_size)] = settings.products.search_page_size,
+    after: Annotated[str | None, Query(description="Opaque cursor from the previous page")] = None,
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> ProductSearchRowsPage:
+    after_key = tuple(decode_cursor(after, float, int)) if after else None
+    hits = await crud.search_products(session=session, q=q, limit=limit + 1, after=after_key)
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1].rank, hits[-1].id)
+    return {"items": [hit._asdict() for hit in hits], "next": next_cursor}
+
+
+@router.get("/batch/", response_model=ProductBatch)
+async def get_products_batch(
+    ids: Annotated[list[str], Query(description="Product ids, repeated or comma-separated")],
+    session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> ProductBatch:
+    try:
+        # dict keeps the request order and drops duplicates
+        product_ids = list(dict.fromkeys(int(value) for chunk in ids for value in chunk.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid product ids: {','.join(ids)!r}",
+        )
+    if len(product_ids) > settings.products.batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.products.batch_max_ids} ids per request",
+        )
+    products = await crud.get_products_by_ids(
+        session=session,
+        product_ids=product_ids,
+        chunk_size=settings.products.batch_chunk_size,
+    )
+    return ProductBatch(
+        items=[products[product_id] for product_id in product_ids if product_id in products],
+        missing=[product_id for product_id in product_ids if product_id not in products],
+    )
+
+
+@router.get("/export/", response_class=StreamingResponse)
+async def export_products(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format")
+) -> StreamingResponse:
+    return StreamingResponse(
+        iter_products_export(export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="products.{export_format.value}"'},
+    )
 
 
 @router.post(
@@ -21,22 +153,80 @@ async def get_products(session: AsyncSession = Depends(db_helper.get_scoped_sess
 )
 async def create_product(
     product_in: ProductCreate,
-    session: AsyncSession = Depends(db_helper.get_scoped_session),
+    response: Response,
+    session: AsyncSession = Depends(db_helper.session_dependency),
 ) -> Product:
-    return await crud.create_product(session=session, product_in=product_in)
+    product = await crud.create_product(
+        session=session,
+        product_in=product_in,
+        coalescer=db_helper.write_coalescer,
+    )
+    response.headers["ETag"] = product_etag(product.id, product.version)
+    return product
 
 
-@router.get("/{product_id}/", response_model=Product)
+@router.post(
+    "/bulk/",
+    response_model=ProductBulkResult,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": ProductCreate.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        },
+    },
+)
+async def create_products_bulk(
+    request: Request,
+    session: AsyncSession = Depends(db_helper.session_dependency),
+) -> ProductBulkResult:
+    items, errors = parse_bulk_body(
+        body=await request.body(),
+        content_type=request.headers.get("content-type", ""),
+    )
+    indexes, products_in, errors = validate_bulk_items(items=items, errors=errors)
+    ids: list[int | None] = [None] * len(items)
+    if products_in:
+        created_ids = await crud.create_products_bulk(
+            session=session,
+            products_in=products_in,
+            batch_size=settings.products.bulk_batch_size,
+        )
+        for index, product_id in zip(indexes, created_ids):
+            ids[index] = product_id
+    return ProductBulkResult(ids=ids, errors=errors)
+
+
+@router.get("/cache/stats/")
+async def get_product_cache_stats() -> dict[str, int]:
+    return product_cache.stats()
+
+
+@router.get(
+    "/{product_id}/",
+    response_model=Product,
+    dependencies=[Depends(check_product_not_modified)],
+)
 async def get_product(
+    response: Response,
     product: Product = Depends(get_product_by_id),
-) -> Product:
+    fields: tuple[str, ...] | None = Depends(get_product_fields),
+) -> Product | RawJSONResponse:
+    etag = product_etag(product.id, product.version, fields)
+    if fields:
+        # served from the product cache, so only the payload is trimmed
+        content = product_fields_adapter(fields).dump_json(product.model_dump(include=set(fields)))
+        return RawJSONResponse(content, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return product
 
 
 # @router.get("/{product_id}/", response_model=Product)
 # async def get_product(
 #     product_id: int,
-#     session: AsyncSession = Depends(db_helper.get_scoped_session),
+#     session: AsyncSession = Depends(db_helper.session_dependency),
 # ):
 #     if product := await crud.get_product(session=session, product_id=product_id):
 #         return product
@@ -47,36 +237,71 @@ async def get_product(
 #         )
 
 
+async def update_product_or_fail(
+    session: AsyncSession,
+    response: Response,
+    product_id: int,
+    product_update: ProductUpdate | ProductUpdatePartial,
+    if_match: str | None,
+    partial: bool = False,
+) -> Product:
+    product = await crud.update_product(
+        session=session,
+        product_id=product_id,
+        product_update=product_update,
+        partial=partial,
+        expected_versions=if_match_versions(if_match, product_id),
+    )
+    if not product:
+        if if_match is None or await crud.get_product_version(session=session, product_id=product_id) is None:
+            raise product_not_found(product_id)
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Product {product_id} was modified",
+        )
+    response.headers["ETag"] = product_etag(product.id, product.version)
+    return product
+
+
 @router.put("/{product_id}/", response_model=Product)
 async def update_product(
+    product_id: Annotated[int, Path],
     product_update: ProductUpdate,
-    product: Product = Depends(get_product_by_id),
-    session: AsyncSession = Depends(db_helper.get_scoped_session),
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
+    session: AsyncSession = Depends(db_helper.session_dependency),
 ) -> Product:
-    return await crud.update_product(
+    return await update_product_or_fail(
         session=session,
-        product=product,
+        response=response,
+        product_id=product_id,
         product_update=product_update,
+        if_match=if_match,
     )
 
 
 @router.patch("/{product_id}/", response_model=Product)
 async def update_product_partial(
+    product_id: Annotated[int, Path],
     product_update: ProductUpdatePartial,
-    product: Product = Depends(get_product_by_id),
-    session: AsyncSession = Depends(db_helper.get_scoped_session),
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
+    session: AsyncSession = Depends(db_helper.session_dependency),
 ) -> Product:
-    return await crud.update_product(
+    return await update_product_or_fail(
         session=session,
-        product=product,
+        response=response,
+        product_id=product_id,
         product_update=product_update,
+        if_match=if_match,
         partial=True,
     )
 
 
 @router.delete("/{product_id}/", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
-    product: Product = Depends(get_product_by_id),
-    session: AsyncSession = Depends(db_helper.get_scoped_session),
+    product_id: Annotated[int, Path],
+    session: AsyncSession = Depends(db_helper.session_dependency),
 ) -> None:
-    await crud.delete_product(session=session, product=product)
+    if not await crud.delete_product(session=session, product_id=product_id):
+        raise product_not_found(product_id)
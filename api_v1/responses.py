@@ -0,0 +1,47 @@
+from collections.abc import Awaitable, Callable
+from functools import wraps
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class RawJSONResponse(Response):
+    """Response whose content is already serialized JSON bytes."""
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def _merge_sub_response(response: Response, kwargs: dict[str, Any]) -> None:
+    # FastAPI merges the injected Response into the returned one only for non-Response returns
+    sub_response = next((value for value in kwargs.values() if isinstance(value, Response)), None)
+    if sub_response is None:
+        return
+    if sub_response.status_code:
+        response.status_code = sub_response.status_code
+    response.headers.raw.extend(sub_response.headers.raw)
+
+
+def json_response(adapter: TypeAdapter) -> Callable:
+    """Serialize the endpoint result with a precompiled adapter, skipping response_model validation.
+
+    `response_model` on the route is still used for the OpenAPI schema. Headers and status set
+    on an injected `Response` parameter are carried over to the returned response.
+    """
+
+    def decorator(endpoint: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Response]]:
+        @wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Response:
+            content = await endpoint(*args, **kwargs)
+            if isinstance(content, Response):
+                return content
+            response = RawJSONResponse(adapter.dump_json(content))
+            _merge_sub_response(response, kwargs)
+            return response
+
+        return wrapper
+
+    return decorator
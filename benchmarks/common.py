@@ -0,0 +1,57 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite file migrated to head, never db.sqlite3:
+
+    python -m benchmarks.<name> --help
+"""
+
+import tempfile
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from core.settings import BASE_DIR, settings
+
+
+def use_throwaway_jwt_keys(directory: Path) -> None:
+    # importing api_v1 reads the JWT keys, which a checkout does not ship
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    settings.auth_jwt.private_key_path = directory / "jwt-private.pem"
+    settings.auth_jwt.private_key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    settings.auth_jwt.public_key_path = directory / "jwt-public.pem"
+    settings.auth_jwt.public_key_path.write_bytes(
+        key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+
+
+def use_temp_database() -> Path:
+    # Call it before the event loop starts (alembic's env.py runs its own) and before
+    # core.models is imported: db_helper reads the URL at import time, which is why the
+    # benchmarks import the application inside main().
+    directory = Path(tempfile.mkdtemp(prefix="bench-"))
+    if not settings.auth_jwt.private_key_path.exists():
+        use_throwaway_jwt_keys(directory)
+    path = directory / "db.sqlite3"
+    settings.db.url = f"sqlite+aiosqlite:///{path}"
+    settings.db.echo = False
+    settings.db.query_stats.enabled = False
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "migrations"))
+    command.upgrade(config, "head")
+    return path
+
+
+def report(label: str, count: int, elapsed: float, unit: str = "rows") -> None:
+    print(f"{label:<32} {count:>9,} {unit} in {elapsed:8.3f}s  {count / elapsed:>12,.0f} {unit}/s")
@@ -0,0 +1,109 @@
+"""Mixed read/write throughput with SQLite's defaults against the tuned pragmas.
+
+    python -m benchmarks.mixed_read_write [--seconds 5] [--readers 16] [--writers 4]
+
+Each configuration gets its own copy of a seeded database. "defaults" is the engine
+before sqlite_pragmas existed (rollback journal, pysqlite's 5 s busy handler);
+"tuned" applies settings.db.sqlite_pragmas (WAL, synchronous=NORMAL, ...). Writers
+run crud.create_product, retries included; readers page through the product list.
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+from collections import Counter
+from pathlib import Path
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from benchmarks.common import use_temp_database
+
+if TYPE_CHECKING:
+    from core.models.db_helper import DatabaseHelper
+
+SEED_PRODUCTS = 10_000
+
+
+async def seed(url: str) -> None:
+    from api_v1.products import crud
+    from api_v1.products.schemas import ProductCreate
+    from core.models.db_helper import DatabaseHelper
+
+    helper = DatabaseHelper(url=url)
+    products_in = [
+        ProductCreate(name=f"product {i}", price=i % 1000, description="seed") for i in range(SEED_PRODUCTS)
+    ]
+    async with helper.session_factory() as session:
+        await crud.create_products_bulk(session=session, products_in=products_in, batch_size=1000)
+    await helper.dispose()
+
+
+async def writer(helper: "DatabaseHelper", until: float, counts: Counter) -> None:
+    from sqlalchemy.exc import OperationalError
+
+    from api_v1.products import crud
+    from api_v1.products.schemas import ProductCreate
+
+    while monotonic() < until:
+        async with helper.session_factory() as session:
+            try:
+                await crud.create_product(
+                    session=session,
+                    product_in=ProductCreate(name="mixed load", price=1, description="write"),
+                )
+                counts["writes"] += 1
+            except OperationalError:
+                counts["failed writes"] += 1
+
+
+async def reader(helper: "DatabaseHelper", until: float, counts: Counter) -> None:
+    from api_v1.products import crud
+
+    rng = random.Random()
+    while monotonic() < until:
+        async with helper.read_session_factory() as session:
+            await crud.get_products(session=session, limit=20, after=(0, rng.randrange(SEED_PRODUCTS)))
+            counts["reads"] += 1
+
+
+async def run(label: str, url: str, pragmas: dict | None, seconds: float, readers: int, writers: int) -> None:
+    from core.models.db_helper import DatabaseHelper
+    from core.retry import retry_counts, retry_give_ups
+
+    helper = DatabaseHelper(url=url, sqlite_pragmas=pragmas, pool_size=writers, read_pool_size=readers)
+    retry_counts.clear()
+    retry_give_ups.clear()
+    counts: Counter[str] = Counter()
+    until = monotonic() + seconds
+    await asyncio.gather(
+        *(writer(helper, until, counts) for _ in range(writers)),
+        *(reader(helper, until, counts) for _ in range(readers)),
+    )
+    await helper.dispose()
+    print(
+        f"{label:<10} reads {counts['reads'] / seconds:>9,.0f}/s  writes {counts['writes'] / seconds:>7,.0f}/s"
+        f"  failed writes {counts['failed writes']:>5}  retries {retry_counts.total():>5}"
+        f"  give-ups {retry_give_ups.total():>4}"
+    )
+
+
+async def main(path: Path, seconds: float, readers: int, writers: int) -> None:
+    from core.settings import settings
+
+    await seed(f"sqlite+aiosqlite:///{path}")
+    configurations = {"defaults": None, "tuned": settings.db.sqlite_pragmas.model_dump()}
+    for label, pragmas in configurations.items():
+        copy = path.with_name(f"{label}.sqlite3")
+        shutil.copyfile(path, copy)
+        await run(label, f"sqlite+aiosqlite:///{copy}", pragmas, seconds, readers, writers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    args = parser.parse_args()
+    path = use_temp_database()
+    asyncio.run(main(path=path, seconds=args.seconds, readers=args.readers, writers=args.writers))
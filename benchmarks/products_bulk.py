@@ -0,0 +1,40 @@
+"""Bulk product creation against the per-row path it replaces.
+
+    python -m benchmarks.products_bulk [--count 20000] [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+
+from benchmarks.common import report, use_temp_database
+
+
+async def main(count: int, batch_size: int) -> None:
+    from api_v1.products import crud
+    from api_v1.products.schemas import ProductCreate
+    from core.models import db_helper
+
+    products_in = [ProductCreate(name=f"product {i}", price=i % 1000, description="benchmark") for i in range(count)]
+    # the per-row path is slow enough that a tenth of the rows gives a stable rate
+    per_row_count = max(count // 10, 1)
+    per_row = products_in[:per_row_count]
+    async with db_helper.session_factory() as session:
+        started = perf_counter()
+        for product_in in per_row:
+            await crud.create_product(session=session, product_in=product_in)
+        report("create_product (per row)", len(per_row), perf_counter() - started)
+
+        started = perf_counter()
+        ids = await crud.create_products_bulk(session=session, products_in=products_in, batch_size=batch_size)
+        report(f"create_products_bulk ({batch_size})", len(ids), perf_counter() - started)
+    await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    use_temp_database()
+    asyncio.run(main(count=args.count, batch_size=args.batch_size))
@@ -0,0 +1,88 @@
+"""Full-text product search latency over a large catalog.
+
+    python -m benchmarks.products_search [--count 1000000] [--queries 200]
+
+Seeds `count` products with names and descriptions drawn from a synthetic
+vocabulary (word frequencies follow a Zipf-like curve, like real catalogs), then
+times crud.search_products for rare, common and multi-word prefix queries.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+from time import perf_counter
+
+from benchmarks.common import report, use_temp_database
+
+SYLLABLES = ("ka", "lo", "mi", "ne", "pu", "ra", "si", "to", "ve", "zu", "bre", "dra", "fli", "gro", "spa")
+
+
+def make_vocabulary(size: int) -> list[str]:
+    words = ("".join(parts) for length in (2, 3, 4) for parts in itertools.product(SYLLABLES, repeat=length))
+    return list(itertools.islice(words, size))
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return sorted(values)[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def seed(count: int, vocabulary: list[str], weights: list[float], batch_size: int = 10_000) -> None:
+    from sqlalchemy import insert
+
+    from core.models import Product, db_helper
+
+    rng = random.Random(0)
+    started = perf_counter()
+    async with db_helper.session_factory() as session:
+        for start in range(0, count, batch_size):
+            rows = [
+                {
+                    "name": " ".join(rng.choices(vocabulary, weights, k=3)),
+                    "description": " ".join(rng.choices(vocabulary, weights, k=12)),
+                    "price": rng.randrange(1, 100_000),
+                }
+                for _ in range(min(batch_size, count - start))
+            ]
+            await session.execute(insert(Product), rows)
+        await session.commit()
+    report("seed (with FTS triggers)", count, perf_counter() - started)
+
+
+async def main(count: int, queries: int) -> None:
+    from api_v1.products import crud
+    from core.models import db_helper
+
+    vocabulary = make_vocabulary(5000)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    await seed(count, vocabulary, weights)
+    rng = random.Random(1)
+    cases = {
+        "rare word": lambda: rng.choice(vocabulary[-1000:]),
+        "rare prefix": lambda: rng.choice(vocabulary[-1000:])[:4],
+        "two words": lambda: " ".join(rng.choices(vocabulary[100:], k=2)),
+        "common word": lambda: rng.choice(vocabulary[:10]),
+    }
+    async with db_helper.read_session_factory() as session:
+        for label, make_query in cases.items():
+            timings = []
+            for _ in range(queries):
+                q = make_query()
+                started = perf_counter()
+                await crud.search_products(session=session, q=q, limit=20)
+                timings.append((perf_counter() - started) * 1000)
+            print(
+                f"search {label:<14} p50 {statistics.median(timings):7.2f} ms"
+                f"  p95 {percentile(timings, 0.95):7.2f} ms  max {max(timings):7.2f} ms"
+            )
+    await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    use_temp_database()
+    asyncio.run(main(count=args.count, queries=args.queries))
@@ -0,0 +1,68 @@
+"""Product list serialization: precompiled TypeAdapter rows against ORM entities.
+
+    python -m benchmarks.products_serialization [--count 10000] [--page-size 100] [--pages 200]
+
+The ORM path is what GET /products/ did before rows were dumped straight to JSON:
+load Product entities, build Page[Product] and let FastAPI validate and encode it
+against the response_model. Both paths include the query, and CPU time is reported
+per item.
+"""
+
+import argparse
+import asyncio
+from time import process_time
+
+from benchmarks.common import use_temp_database
+
+
+def report_cpu(label: str, items: int, elapsed: float) -> None:
+    print(f"{label:<32} {items:>9,} items {elapsed:8.3f}s CPU  {elapsed / items * 1e6:8.2f} us/item")
+
+
+async def main(count: int, page_size: int, pages: int) -> None:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from sqlalchemy import select
+
+    from api_v1.pagination import Page
+    from api_v1.products import crud
+    from api_v1.products.schemas import Product, ProductCreate, product_rows_page_adapter
+    from api_v1.responses import RawJSONResponse
+    from core.models import Product as ProductModel, db_helper
+
+    async with db_helper.session_factory() as session:
+        products_in = [ProductCreate(name=f"product {i}", price=i % 1000, description="x" * 80) for i in range(count)]
+        await crud.create_products_bulk(session=session, products_in=products_in, batch_size=1000)
+
+    response_field = create_response_field(name="Response_get_products", type_=Page[Product])
+    async with db_helper.read_session_factory() as session:
+        started = process_time()
+        for _ in range(pages):
+            products = await session.scalars(select(ProductModel).order_by(ProductModel.id).limit(page_size))
+            page = Page[Product](items=list(products), next=None)
+            content = await serialize_response(field=response_field, response_content=page)
+            JSONResponse(content)
+            session.expunge_all()
+        orm = process_time() - started
+        report_cpu("ORM + response_model", pages * page_size, orm)
+
+        started = process_time()
+        for _ in range(pages):
+            rows = await crud.get_products(session=session, limit=page_size)
+            page = {"items": [row._asdict() for row in rows], "next": None}
+            RawJSONResponse(product_rows_page_adapter.dump_json(page))
+        rows = process_time() - started
+        report_cpu("rows + TypeAdapter", pages * page_size, rows)
+    print(f"speedup {orm / rows:.1f}x per item")
+    await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+    use_temp_database()
+    asyncio.run(main(count=args.count, page_size=args.page_size, pages=args.pages))
@@ -1,10 +1,13 @@
 from .base import Base
+from .daily_sales import DailyProductSales, DailyPromocodeUsage, DailySales
 from .db_helper import DatabaseHelper, db_helper
 from .order import Order
+from .order_archive import OrderArchive, OrderProductAssociationArchive
 from .order_product_ossociation import OrderProductAssociation
 from .post import Post
 from .product import Product
 from .profile import Profile
+from .table_version import TableVersion
 from .user import User
 
 __all__ = (
@@ -17,4 +20,10 @@ __all__ = (
     "Profile",
     "Order",
     "OrderProductAssociation",
+    "TableVersion",
+    "DailySales",
+    "DailyProductSales",
+    "DailyPromocodeUsage",
+    "OrderArchive",
+    "OrderProductAssociationArchive",
 )
@@ -0,0 +1,51 @@
+from datetime import date
+
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+# Rollups below are maintained by the *_rollup_* triggers on orders and
+# order_product_association, they are never written by the application.
+
+
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+
+    day: Mapped[date] = mapped_column(unique=True)
+    orders_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    items_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    revenue: Mapped[int] = mapped_column(default=0, server_default="0")
+
+
+class DailyProductSales(Base):
+    __tablename__ = "daily_product_sales"
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "product_id",
+            name="idx_unique_daily_product_sales",
+        ),
+    )
+
+    day: Mapped[date]
+    # no foreign key: the history outlives deleted products
+    product_id: Mapped[int]
+    units: Mapped[int] = mapped_column(default=0, server_default="0")
+    revenue: Mapped[int] = mapped_column(default=0, server_default="0")
+
+
+class DailyPromocodeUsage(Base):
+    __tablename__ = "daily_promocode_usage"
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "promocode",
+            name="idx_unique_daily_promocode_usage",
+        ),
+    )
+
+    day: Mapped[date]
+    promocode: Mapped[str]
+    orders_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    revenue: Mapped[int] = mapped_column(default=0, server_default="0")
@@ -1,38 +1,177 @@
-from asyncio import current_task
+from collections.abc import AsyncIterator
+from time import perf_counter
 from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
+from core.query_stats import instrument_engine
 from core.settings import settings
+from core.write_coalescer import WriteCoalescer
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long checkouts wait for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = perf_counter() - started
+            self.wait_count += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": self.wait_count,
+            "wait_avg_ms": self.wait_total / self.wait_count * 1000 if self.wait_count else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
 
 
 class DatabaseHelper:
-    def __init__(self, url: str, echo: bool = False) -> None:
-        self.engine = create_async_engine(
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_pre_ping: bool = False,
+        pool_recycle: int = -1,
+        sqlite_pragmas: dict[str, str | int] | None = None,
+        read_url: str | None = None,
+        read_pool_size: int = 10,
+        read_max_overflow: int = 10,
+        instrument: bool = False,
+        write_coalescing: bool = False,
+        write_coalescing_max_delay: float = 0.005,
+        write_coalescing_max_batch: int = 100,
+    ) -> None:
+        pool_options = {"pool_timeout": pool_timeout, "pool_pre_ping": pool_pre_ping, "pool_recycle": pool_recycle}
+        self.engine = self.create_engine(
             url=url,
             echo=echo,
+            instrument=instrument,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            sqlite_pragmas=sqlite_pragmas,
+            **pool_options,
         )
+        if read_url is None and make_url(url).get_backend_name() != "sqlite":
+            self.read_engine = self.engine
+        else:
+            # For SQLite the read pool opens the same file, and query_only guards
+            # against writes slipping through it.
+            self.read_engine = self.create_engine(
+                url=read_url or url,
+                echo=echo,
+                instrument=instrument,
+                pool_size=read_pool_size,
+                max_overflow=read_max_overflow,
+                sqlite_pragmas={**(sqlite_pragmas or {}), "query_only": "ON"},
+                **pool_options,
+            )
         self.session_factory = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
-
-    def get_scoped_session(self) -> async_scoped_session[AsyncSession | Any]:
-        session = async_scoped_session(
-            session_factory=self.session_factory,
-            scopefunc=current_task,
+        self.read_session_factory = async_sessionmaker(
+            bind=self.read_engine,
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
         )
-        return session
+        self.write_coalescer = (
+            WriteCoalescer(
+                session_factory=self.session_factory,
+                max_delay=write_coalescing_max_delay,
+                max_batch=write_coalescing_max_batch,
+            )
+            if write_coalescing
+            else None
+        )
+
+    @classmethod
+    def create_engine(
+        cls,
+        url: str,
+        echo: bool,
+        sqlite_pragmas: dict[str, str | int] | None = None,
+        instrument: bool = False,
+        **pool_options: Any,
+    ) -> AsyncEngine:
+        engine = create_async_engine(url=url, echo=echo, poolclass=TimedQueuePool, **pool_options)
+        if instrument:
+            instrument_engine(engine.sync_engine)
+        if sqlite_pragmas and engine.dialect.name == "sqlite":
+            event.listen(engine.sync_engine, "connect", cls.sqlite_pragmas_listener(sqlite_pragmas))
+        return engine
+
+    @staticmethod
+    def sqlite_pragmas_listener(pragmas: dict[str, str | int]) -> Any:
+        def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+        return set_sqlite_pragmas
 
-    async def session_dependency(self) -> AsyncSession:
-        async with self.get_scoped_session() as session:
+    async def session_dependency(self) -> AsyncIterator[AsyncSession]:
+        # one session per request: FastAPI caches the dependency, so routes and their
+        # dependencies share it, and it is closed once the response is done
+        async with self.session_factory() as session:
             yield session
-            await session.remove()
+
+    async def read_session_dependency(self) -> AsyncIterator[AsyncSession]:
+        async with self.read_session_factory() as session:
+            yield session
+
+    async def dispose(self) -> None:
+        if self.write_coalescer is not None:
+            await self.write_coalescer.close()
+        await self.engine.dispose()
+        if self.read_engine is not self.engine:
+            await self.read_engine.dispose()
+
+    def pool_stats(self) -> dict[str, dict[str, int | float]]:
+        stats = {"primary": self.engine.pool.stats()}
+        if self.read_engine is not self.engine:
+            stats["read"] = self.read_engine.pool.stats()
+        return stats
 
 
 db_helper = DatabaseHelper(
     url=settings.db.url,
     echo=settings.db.echo,
+    pool_size=settings.db.pool_size,
+    max_overflow=settings.db.max_overflow,
+    pool_timeout=settings.db.pool_timeout,
+    pool_pre_ping=settings.db.pool_pre_ping,
+    pool_recycle=settings.db.pool_recycle,
+    sqlite_pragmas=settings.db.sqlite_pragmas.model_dump(),
+    read_url=settings.db.read_url,
+    read_pool_size=settings.db.read_pool_size,
+    read_max_overflow=settings.db.read_max_overflow,
+    instrument=settings.db.query_stats.enabled,
+    write_coalescing=settings.db.write_coalescing.enabled,
+    write_coalescing_max_delay=settings.db.write_coalescing.max_delay_ms / 1000,
+    write_coalescing_max_batch=settings.db.write_coalescing.max_batch,
 )
@@ -15,7 +15,11 @@ class Order(Base):
     created_at: Mapped[datetime] = mapped_column(
         server_default=func.now(),
         default=datetime.now,
+        index=True,
     )
+    # kept up to date by the order_totals_* triggers on order_product_association
+    total_amount: Mapped[int] = mapped_column(default=0, server_default="0")
+    items_count: Mapped[int] = mapped_column(default=0, server_default="0")
     # products: Mapped[list["Product"]] = relationship(
     #     secondary="order_product_association",
     #     back_populates="orders",
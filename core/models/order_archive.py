@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+# Cold copies of old orders, moved out of the hot tables by api_v1.orders.archive.
+# Orders keep their original ids (the newest order never leaves the hot table, so order
+# ids are not reused); line ids are reused by SQLite, so archived lines get their own id
+# and keep the original one in source_id. No foreign keys, the history outlives products.
+
+
+class OrderArchive(Base):
+    __tablename__ = "orders_archive"
+
+    promocode: Mapped[str | None]
+    created_at: Mapped[datetime]
+    total_amount: Mapped[int] = mapped_column(default=0, server_default="0")
+    items_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    archived_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+
+class OrderProductAssociationArchive(Base):
+    __tablename__ = "order_product_association_archive"
+
+    source_id: Mapped[int]
+    order_id: Mapped[int] = mapped_column(index=True)
+    product_id: Mapped[int]
+    count: Mapped[int]
+    unit_price: Mapped[int]
@@ -22,7 +22,8 @@ class OrderProductAssociation(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
-    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    # the unique (order_id, product_id) index covers lookups by order only
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), index=True)
     count: Mapped[int] = mapped_column(default=1, server_default="1")
     unit_price: Mapped[int] = mapped_column(default=0, server_default="0")
 
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.models.base import Base
 
@@ -9,9 +9,12 @@ if TYPE_CHECKING:
 
 
 class Product(Base):
-    name: Mapped[str]
-    price: Mapped[int]
+    # secondary indexes carry the rowid, so they also serve (name, id) / (price, id) keysets
+    name: Mapped[str] = mapped_column(index=True)
+    price: Mapped[int] = mapped_column(index=True)
     description: Mapped[str]
+    # bumped on every update, used for ETags and If-Match
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
     # orders: Mapped[list["Order"]] = relationship(
     #     secondary="order_product_association",
     #     back_populates="products",
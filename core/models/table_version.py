@@ -0,0 +1,11 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    # bumped by triggers on every write to the named table
+    name: Mapped[str] = mapped_column(unique=True)
+    version: Mapped[int] = mapped_column(default=0, server_default="0")
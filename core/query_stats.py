@@ -0,0 +1,122 @@
+import logging
+import random
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    """Statements issued while handling one request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: str | None = None
+        self.shapes: Counter[str] = Counter()
+        self.retries = 0
+
+    def add(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement] += 1
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        return [(statement, count) for statement, count in self.shapes.most_common() if count >= threshold]
+
+
+class RouteQueryStats:
+    """Totals over every request served by one route."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.statements = 0
+        self.max_statements = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: str | None = None
+        self.n_plus_one_requests = 0
+        self.retries = 0
+
+    def add(self, stats: RequestQueryStats, n_plus_one: bool) -> None:
+        self.requests += 1
+        self.statements += stats.count
+        self.max_statements = max(self.max_statements, stats.count)
+        self.total_time += stats.total_time
+        self.n_plus_one_requests += n_plus_one
+        self.retries += stats.retries
+        if stats.slowest_time > self.slowest_time:
+            self.slowest_time = stats.slowest_time
+            self.slowest_statement = stats.slowest_statement
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "statements_per_request": self.statements / self.requests if self.requests else 0.0,
+            "max_statements": self.max_statements,
+            "db_time_ms": self.total_time * 1000,
+            "slowest_ms": self.slowest_time * 1000,
+            "slowest_statement": self.slowest_statement,
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "retries": self.retries,
+        }
+
+
+current_query_stats: ContextVar[RequestQueryStats | None] = ContextVar("current_query_stats", default=None)
+route_query_stats: dict[str, RouteQueryStats] = {}
+
+
+def before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    conn.info.setdefault("query_started_at", []).append(perf_counter())
+
+
+def after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    duration = perf_counter() - conn.info["query_started_at"].pop()
+    if stats := current_query_stats.get():
+        stats.add(statement, duration)
+    config = settings.db.query_stats
+    if duration * 1000 >= config.slow_query_ms and random.random() < config.slow_query_sample_rate:
+        logger.warning("Slow query (%.1f ms): %s", duration * 1000, statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[RequestQueryStats]:
+    stats = RequestQueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def record_request(route: str, stats: RequestQueryStats) -> None:
+    repeated = stats.repeated_shapes(settings.db.query_stats.n_plus_one_threshold)
+    for statement, count in repeated:
+        logger.warning("Possible N+1 in %s: %d x %s", route, count, statement)
+    route_query_stats.setdefault(route, RouteQueryStats()).add(stats, n_plus_one=bool(repeated))
+
+
+def get_route_query_stats() -> dict[str, dict[str, Any]]:
+    return {route: stats.as_dict() for route, stats in sorted(route_query_stats.items())}
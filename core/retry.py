@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import random
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from functools import wraps
+from time import monotonic
+from typing import ParamSpec, TypeVar
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.query_stats import current_query_stats
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Params = ParamSpec("Params")
+T = TypeVar("T")
+
+# SQLite reports lock contention only through the message; PostgreSQL and MySQL
+# through SQLSTATE 40001 (serialization failure) / 40P01 (deadlock).
+LOCK_ERROR_MESSAGES = ("database is locked", "database table is locked", "deadlock")
+LOCK_ERROR_SQLSTATES = {"40001", "40P01"}
+
+retry_counts: Counter[str] = Counter()
+retry_give_ups: Counter[str] = Counter()
+
+
+def is_lock_error(error: BaseException) -> bool:
+    if not isinstance(error, DBAPIError):
+        return False
+    if getattr(error.orig, "sqlstate", None) in LOCK_ERROR_SQLSTATES:
+        return True
+    if getattr(error.orig, "pgcode", None) in LOCK_ERROR_SQLSTATES:
+        return True
+    message = str(error.orig).lower()
+    return isinstance(error, OperationalError) and any(text in message for text in LOCK_ERROR_MESSAGES)
+
+
+def backoff_delay(attempt: int) -> float:
+    config = settings.db.retry
+    # "full jitter": uniform over [0, base * 2**attempt], capped
+    return random.uniform(0, min(config.max_delay_ms, config.base_delay_ms * 2**attempt)) / 1000
+
+
+def retry_delay(name: str, attempt: int, deadline: float, error: DBAPIError) -> float | None:
+    """Backoff before the next attempt, or None once attempts or the deadline run out."""
+    delay = backoff_delay(attempt - 1)
+    if attempt >= settings.db.retry.max_attempts or monotonic() + delay > deadline:
+        retry_give_ups[name] += 1
+        logger.warning("Giving up on %s after %d attempts: %s", name, attempt, error.orig)
+        return None
+    retry_counts[name] += 1
+    if stats := current_query_stats.get():
+        stats.retries += 1
+    return delay
+
+
+async def wait_before_retry(
+    session: AsyncSession,
+    name: str,
+    attempt: int,
+    deadline: float,
+    error: DBAPIError,
+) -> None:
+    """Roll back and back off before the next attempt; re-raise `error` if it can't be retried."""
+    if not is_lock_error(error):
+        raise error
+    await session.rollback()
+    delay = retry_delay(name, attempt, deadline, error)
+    if delay is None:
+        raise error
+    await asyncio.sleep(delay)
+
+
+def retry_on_lock(func: Callable[Params, Awaitable[T]]) -> Callable[Params, Awaitable[T]]:
+    """Re-run a unit of work that failed on a lock or serialization error.
+
+    The wrapped function must take the session as its first argument (or `session=`),
+    own the whole transaction and be safe to run again from scratch: the session is
+    rolled back before every retry. Gives up after `settings.db.retry.max_attempts`
+    attempts or once the next sleep would cross the deadline, re-raising the last error.
+    """
+
+    @wraps(func)
+    async def wrapper(*args: Params.args, **kwargs: Params.kwargs) -> T:
+        session: AsyncSession = kwargs["session"] if "session" in kwargs else args[0]
+        deadline = monotonic() + settings.db.retry.deadline_ms / 1000
+        attempt = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except DBAPIError as e:
+                attempt += 1
+                await wait_before_retry(session, func.__qualname__, attempt, deadline, e)
+
+    return wrapper
+
+
+def get_retry_stats() -> dict[str, dict[str, int]]:
+    return {
+        name: {"retries": retry_counts[name], "give_ups": retry_give_ups[name]}
+        for name in sorted(retry_counts.keys() | retry_give_ups.keys())
+    }
@@ -8,10 +8,100 @@ BASE_DIR = Path(__file__).parent.parent
 DB_PATH = BASE_DIR / "db.sqlite3"
 
 
+class SqlitePragmas(BaseModel):
+    # applied to every new SQLite connection
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    # ms; one attempt's wait for the write lock, core.retry takes over after it (see RetrySettings)
+    busy_timeout: int = 1_000
+    cache_size: int = -64_000  # negative means KiB
+    mmap_size: int = 256 * 1024 * 1024
+    temp_store: str = "MEMORY"
+
+
+class QueryStatsSettings(BaseModel):
+    enabled: bool = True
+    slow_query_ms: float = 100.0
+    slow_query_sample_rate: float = 1.0
+    # identical statements repeated this many times in one request are reported as N+1
+    n_plus_one_threshold: int = 5
+
+
+class WriteCoalescingSettings(BaseModel):
+    # opt-in group commit for small inserts, see core.write_coalescer
+    enabled: bool = False
+    max_delay_ms: float = 5.0
+    max_batch: int = 100
+
+
+class RetrySettings(BaseModel):
+    # re-running write transactions that hit SQLITE_BUSY, see core.retry. Every attempt first
+    # waits up to sqlite_pragmas.busy_timeout, so the deadline must leave room for several of
+    # them: 5 attempts x (1 s busy wait + up to 0.5 s backoff) stay under 10 s.
+    max_attempts: int = 5
+    base_delay_ms: float = 10.0
+    max_delay_ms: float = 500.0
+    deadline_ms: float = 10_000.0
+
+
 class DbSettings(BaseModel):
     url: str = f"sqlite+aiosqlite:///{DB_PATH}"
     # echo: bool = False
     echo: bool = True
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    sqlite_pragmas: SqlitePragmas = SqlitePragmas()
+    query_stats: QueryStatsSettings = QueryStatsSettings()
+    write_coalescing: WriteCoalescingSettings = WriteCoalescingSettings()
+    retry: RetrySettings = RetrySettings()
+    # read-only engine: a replica URL, or None for query_only connections to `url` (SQLite)
+    read_url: str | None = None
+    read_pool_size: int = 10
+    read_max_overflow: int = 10
+
+
+class ProductCacheSettings(BaseModel):
+    max_size: int = 10_000
+    ttl_seconds: float = 60.0
+    # how often to poll table_versions for writes made by other workers; None disables it
+    sync_interval_seconds: float | None = None
+
+
+class ProductsSettings(BaseModel):
+    page_size: int = 50
+    max_page_size: int = 500
+    export_chunk_size: int = 1000
+    bulk_batch_size: int = 1000
+    bulk_max_items: int = 50_000
+    search_page_size: int = 20
+    batch_max_ids: int = 1000
+    # keeps WHERE id IN (...) under SQLite's bound-parameter limit (999 before SQLite 3.32)
+    batch_chunk_size: int = 500
+    cache: ProductCacheSettings = ProductCacheSettings()
+
+
+class OrdersSettings(BaseModel):
+    max_items: int = 200
+    page_size: int = 50
+    max_page_size: int = 500
+    # order ids per IN (...) when loading a page's line items, under SQLite's bound-parameter limit
+    eager_chunk_size: int = 500
+    # order ids per transaction when adding a line item to existing orders
+    campaign_chunk_size: int = 5000
+    jobs_history: int = 100
+    archive_after_days: int = 365
+    archive_chunk_size: int = 1000
+
+
+class AnalyticsSettings(BaseModel):
+    top_limit: int = 10
+    max_top_limit: int = 100
+    snapshot_chunk_size: int = 10_000
+    # the line item snapshot only appends new rows in between full rebuilds
+    snapshot_rebuild_interval_seconds: float = 600
 
 
 class AuthJWT(BaseModel):
@@ -27,6 +117,12 @@ class Settings(BaseSettings):
 
     db: DbSettings = DbSettings()
 
+    products: ProductsSettings = ProductsSettings()
+
+    orders: OrdersSettings = OrdersSettings()
+
+    analytics: AnalyticsSettings = AnalyticsSettings()
+
     auth_jwt: AuthJWT = AuthJWT()
 
 
@@ -0,0 +1,133 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+from typing import Any, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.retry import is_lock_error
+
+T = TypeVar("T")
+
+WriteOperation = Callable[..., Awaitable[Any]]
+PendingWrite = tuple[WriteOperation, tuple[Any, ...], asyncio.Future]
+Outcome = tuple[Any, BaseException | None]
+
+
+class WriteCoalescer:
+    """Group commit: runs concurrent small writes in one transaction.
+
+    Submitted operations wait up to `max_delay` seconds or until `max_batch` of them
+    are queued, then run one after another in a shared session and are committed
+    once. If any of them fails, the batch is rolled back and every operation is run
+    again in its own transaction, so a failing operation only rejects its own caller;
+    a lock error rejects the whole batch instead, for the callers to retry.
+    Operations must not commit and must be safe to run twice; every caller gets its
+    own result after the commit that covers it succeeds.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_delay: float,
+        max_batch: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._pending: list[PendingWrite] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self.flush_count = 0
+        self.item_count = 0
+        self.batch_size_max = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+
+    async def submit(self, operation: Callable[..., Awaitable[T]], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((operation, args, future))
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._schedule_flush)
+        return await future
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[PendingWrite]) -> None:
+        # one flush at a time: the database has a single writer anyway, and
+        # requests arriving meanwhile pile up into the next, larger batch
+        async with self._lock:
+            started = perf_counter()
+            outcomes = await self._run(batch)
+            for (_, _, future), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            self._record_flush(len(batch), perf_counter() - started)
+
+    async def _run(self, batch: list[PendingWrite]) -> list[Outcome]:
+        try:
+            return await self._run_batch(batch)
+        except Exception as e:
+            if is_lock_error(e):
+                # contention is no single operation's fault, and re-running them one by one
+                # would busy-wait once per operation while later batches queue behind the lock:
+                # reject them all and let each caller's retry_on_lock back off and resubmit
+                return [(None, e)] * len(batch)
+            # one operation took the shared transaction down with it: fall back to
+            # a transaction per operation so only its own caller sees the error
+            return [await self._run_one(operation, args) for operation, args, _ in batch]
+
+    async def _run_batch(self, batch: list[PendingWrite]) -> list[Outcome]:
+        async with self.session_factory() as session:
+            results = [await operation(session, *args) for operation, args, _ in batch]
+            await session.commit()
+        return [(result, None) for result in results]
+
+    async def _run_one(self, operation: WriteOperation, args: tuple[Any, ...]) -> Outcome:
+        try:
+            async with self.session_factory() as session:
+                result = await operation(session, *args)
+                await session.commit()
+        except Exception as e:
+            return None, e
+        return result, None
+
+    def _record_flush(self, size: int, elapsed: float) -> None:
+        self.flush_count += 1
+        self.item_count += size
+        self.batch_size_max = max(self.batch_size_max, size)
+        self.flush_time_total += elapsed
+        self.flush_time_max = max(self.flush_time_max, elapsed)
+
+    async def close(self) -> None:
+        self._schedule_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flush_count,
+            "items": self.item_count,
+            "batch_size_avg": self.item_count / self.flush_count if self.flush_count else 0.0,
+            "batch_size_max": self.batch_size_max,
+            "flush_latency_avg_ms": self.flush_time_total / self.flush_count * 1000 if self.flush_count else 0.0,
+            "flush_latency_max_ms": self.flush_time_max * 1000,
+        }
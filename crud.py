@@ -5,8 +5,13 @@ from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
+from api_v1.orders.crud import add_line_item_to_orders
+from api_v1.orders.schemas import LineItemCampaign
 from api_v1.products.schemas import ProductCreate
 from core.models import Order, OrderProductAssociation, Post, Product, Profile, User, db_helper
+from core.retry import retry_on_lock
+from core.settings import settings
+from core.write_coalescer import WriteCoalescer
 
 
 async def create_user(session: AsyncSession, username: str) -> User:
@@ -136,16 +141,30 @@ async def get_profiles_with_users_and_users_with_posts(session: AsyncSession) ->
         print(profile.user.posts)
 
 
-async def create_order(
+async def insert_order(
     session: AsyncSession,
     promocode: str | None = None,
 ) -> Order:
     order = Order(promocode=promocode)
     session.add(order)
+    await session.flush()
+    return order
+
+
+@retry_on_lock
+async def create_order(
+    session: AsyncSession,
+    promocode: str | None = None,
+    coalescer: WriteCoalescer | None = None,
+) -> Order:
+    if coalescer is not None:
+        return await coalescer.submit(insert_order, promocode)
+    order = await insert_order(session, promocode)
     await session.commit()
     return order
 
 
+@retry_on_lock
 async def create_product(
     session: AsyncSession,
     product_in: ProductCreate,
@@ -261,7 +280,6 @@ async def demo_get_orders_with_products_with_assoc(session: AsyncSession) -> lis
 
 
 async def create_gift_product_for_existing_orders(session: AsyncSession):
-    orders = await get_orders_with_products_assoc(session)
     gift_product = await create_product(
         session,
         ProductCreate(
@@ -270,15 +288,12 @@ async def create_gift_product_for_existing_orders(session: AsyncSession):
             description="Gift for you",
         ),
     )
-    for order in orders:
-        order.products_details.append(
-            OrderProductAssociation(
-                product=gift_product,
-                count=1,
-                unit_price=0,
-            ),
-        )
-    await session.commit()
+    inserted = await add_line_item_to_orders(
+        session,
+        LineItemCampaign(product_id=gift_product.id, unit_price=0),
+        chunk_size=settings.orders.campaign_chunk_size,
+    )
+    print("gift added to", inserted, "orders")
 
 
 async def main_relations(session: AsyncSession):
@@ -1,9 +1,14 @@
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
 
 from api_v1 import router as router_v1
+from core.models import db_helper
+from core.query_stats import record_request, track_queries
+from core.retry import is_lock_error
 from core.settings import settings
 from items_views import router as items_router
 from users.views import router as users_router
@@ -12,9 +17,35 @@ from users.views import router as users_router
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> None:
     yield
+    await db_helper.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
+
+
+if settings.db.query_stats.enabled:
+
+    @app.middleware("http")
+    async def track_db_queries(request: Request, call_next) -> Response:
+        with track_queries() as stats:
+            response = await call_next(request)
+        route = request.scope.get("route")
+        record_request(f"{request.method} {route.path if route else '<unmatched>'}", stats)
+        return response
+
+
+@app.exception_handler(OperationalError)
+async def database_busy_handler(request: Request, exc: OperationalError) -> Response:
+    # lock contention that outlived retry_on_lock: tell the client to come back
+    if not is_lock_error(exc):
+        raise exc
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, try again"},
+        headers={"Retry-After": "1"},
+    )
+
+
 app.include_router(router=router_v1, prefix=settings.api_v1_prefix)
 app.include_router(users_router)
 app.include_router(items_router)
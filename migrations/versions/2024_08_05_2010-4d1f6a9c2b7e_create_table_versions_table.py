@@ -0,0 +1,46 @@
+"""Create table_versions table with products triggers
+
+Revision ID: 4d1f6a9c2b7e
+Revises: ca7b0afd2442
+Create Date: 2024-08-05 20:10:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4d1f6a9c2b7e"
+down_revision: Union[str, None] = "ca7b0afd2442"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "table_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.execute("INSERT INTO table_versions (name, version) VALUES ('products', 0)")
+    for event in ("insert", "update", "delete"):
+        op.execute(
+            f"""
+            CREATE TRIGGER products_version_after_{event} AFTER {event.upper()} ON products
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'products';
+            END
+            """
+        )
+
+
+def downgrade() -> None:
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER IF EXISTS products_version_after_{event}")
+    op.drop_table("table_versions")
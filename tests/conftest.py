@@ -0,0 +1,20 @@
+import httpx
+import pytest
+
+from benchmarks.common import use_temp_database
+
+# before any test module imports the application: db_helper reads the URL at import time
+use_temp_database()
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def client() -> httpx.AsyncClient:
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
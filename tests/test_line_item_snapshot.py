@@ -0,0 +1,84 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import pytest
+
+from api_v1.analytics.schemas import TopProductsBy
+from api_v1.analytics.snapshot import LineItemSnapshot
+
+START = 1_700_000_000
+DAY = 86_400
+SINCE = datetime.fromtimestamp(START + 3 * DAY, tz=timezone.utc)
+
+
+def make_rows(count: int) -> list[tuple[int, int, int, int]]:
+    # (product_id, count, unit_price, created_at), hourly over a month
+    rng = random.Random(0)
+    return [
+        (rng.randrange(1, 50), rng.randrange(1, 5), rng.randrange(1, 1000), START + i * 3_600) for i in range(count)
+    ]
+
+
+def make_snapshot(rows: list[tuple[int, int, int, int]]) -> LineItemSnapshot:
+    snapshot = LineItemSnapshot(session_factory=None, chunk_size=100, rebuild_interval_seconds=60)
+    for order_id, (product_id, count, unit_price, created_at) in enumerate(rows, start=1):
+        snapshot.order_id.append(order_id)
+        snapshot.product_id.append(product_id)
+        snapshot.count.append(count)
+        snapshot.unit_price.append(unit_price)
+        snapshot.created_at.append(created_at)
+    return snapshot
+
+
+def expected_totals(rows: list[tuple[int, int, int, int]], since: int) -> dict[int, tuple[int, int]]:
+    totals: defaultdict[int, tuple[int, int]] = defaultdict(lambda: (0, 0))
+    for product_id, count, unit_price, created_at in rows:
+        if created_at >= since:
+            units, revenue = totals[product_id]
+            totals[product_id] = (units + count, revenue + count * unit_price)
+    return dict(totals)
+
+
+def test_product_totals() -> None:
+    rows = make_rows(720)
+    snapshot = make_snapshot(rows)
+    assert snapshot.product_totals() == expected_totals(rows, since=0)
+    assert snapshot.product_totals(since=SINCE) == expected_totals(rows, since=int(SINCE.timestamp()))
+
+
+@pytest.mark.parametrize("by", TopProductsBy)
+@pytest.mark.parametrize("limit", [1, 5, 100])
+def test_top_products_break_ties_by_id(by: TopProductsBy, limit: int) -> None:
+    rows = make_rows(720) + [(1000, 1, 1, START), (1001, 1, 1, START), (999, 1, 1, START)]
+    index = 0 if by is TopProductsBy.units else 1
+    totals = expected_totals(rows, since=0)
+    expected = sorted(totals.items(), key=lambda item: (-item[1][index], item[0]))[:limit]
+    top = make_snapshot(rows).top_products(by=by, limit=limit)
+    assert top == [(product_id, units, revenue) for product_id, (units, revenue) in expected]
+
+
+def test_time_buckets() -> None:
+    rows = make_rows(720)
+    expected: defaultdict[int, tuple[int, int]] = defaultdict(lambda: (0, 0))
+    for _, count, unit_price, created_at in rows:
+        units, revenue = expected[created_at - created_at % DAY]
+        expected[created_at - created_at % DAY] = (units + count, revenue + count * unit_price)
+    buckets = make_snapshot(rows).time_buckets(bucket_seconds=DAY)
+    assert buckets == [(bucket, units, revenue) for bucket, (units, revenue) in sorted(expected.items())]
+
+
+def test_empty_snapshot() -> None:
+    snapshot = make_snapshot([])
+    assert snapshot.product_totals() == {}
+    assert snapshot.top_products(by=TopProductsBy.units, limit=10) == []
+    assert snapshot.time_buckets(bucket_seconds=DAY) == []
+
+
+def test_snapshot_grows_after_a_report() -> None:
+    # reports must release their views of the arrays, or the next refresh can't append
+    snapshot = make_snapshot(make_rows(10))
+    snapshot.top_products(by=TopProductsBy.revenue, limit=3)
+    snapshot.time_buckets(bucket_seconds=DAY, since=SINCE)
+    snapshot.product_id.extend([1, 2, 3])
+    assert len(snapshot.product_id) == 13
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import select
+
+from api_v1.analytics import crud as analytics_crud
+from api_v1.analytics.schemas import TopProductsBy
+from api_v1.products import crud as products_crud
+from api_v1.products.schemas import ProductCreate
+
+
+async def create_products(count: int) -> list[int]:
+    from core.models import db_helper
+
+    products_in = [ProductCreate(name=f"line item {i}", price=10 * (i + 1), description="") for i in range(count)]
+    async with db_helper.session_factory() as session:
+        return await products_crud.create_products_bulk(session=session, products_in=products_in, batch_size=count)
+
+
+async def product_sales_days(product_id: int) -> list:
+    from core.models import DailyProductSales, db_helper
+
+    async with db_helper.read_session_factory() as session:
+        return list(await session.scalars(select(DailyProductSales).where(DailyProductSales.product_id == product_id)))
+
+
+@pytest.mark.anyio
+async def test_removing_a_product_not_in_the_order_leaves_no_trace(client) -> None:
+    in_order, not_in_order = await create_products(2)
+    response = await client.post("/api/v1/orders/", json={"items": [{"product_id": in_order, "count": 2}]})
+    order_id = response.json()["id"]
+
+    response = await client.post(
+        f"/api/v1/orders/{order_id}/items/",
+        json=[{"product_id": not_in_order, "count": -1}, {"product_id": in_order, "count": -1}],
+    )
+
+    assert response.status_code == 200
+    assert [(item["product_id"], item["count"]) for item in response.json()] == [(in_order, 1)]
+    assert await product_sales_days(not_in_order) == []
+
+
+@pytest.mark.anyio
+async def test_removing_all_units_drops_the_line(client) -> None:
+    first, second = await create_products(2)
+    items = [{"product_id": first, "count": 1}, {"product_id": second, "count": 1}]
+    order_id = (await client.post("/api/v1/orders/", json={"items": items})).json()["id"]
+
+    response = await client.post(f"/api/v1/orders/{order_id}/items/", json=[{"product_id": first, "count": -3}])
+
+    assert [item["product_id"] for item in response.json()] == [second]
+    order = (await client.get(f"/api/v1/orders/{order_id}/")).json()
+    assert (order["total_amount"], order["items_count"]) == (20, 1)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("by", list(TopProductsBy))
+async def test_fully_removed_products_are_not_ranked(client, by: TopProductsBy) -> None:
+    from core.models import db_helper
+
+    removed, kept = await create_products(2)
+    items = [{"product_id": removed, "count": 1}, {"product_id": kept, "count": 1}]
+    order_id = (await client.post("/api/v1/orders/", json={"items": items})).json()["id"]
+    await client.post(f"/api/v1/orders/{order_id}/items/", json=[{"product_id": removed, "count": -1}])
+
+    async with db_helper.read_session_factory() as session:
+        top = await analytics_crud.get_top_products(session=session, by=by, limit=1_000_000)
+
+    assert [product.product_id for product in top if product.product_id in (removed, kept)] == [kept]
+    assert all(getattr(product, by.value) > 0 for product in top)
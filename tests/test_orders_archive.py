@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, select, update
+
+from api_v1.orders import crud
+from api_v1.orders.archive import archive_orders
+from api_v1.orders.schemas import OrderCreate, OrderItemCreate
+from api_v1.products import crud as products_crud
+from api_v1.products.schemas import ProductCreate
+
+
+@pytest.mark.anyio
+async def test_archive_survives_reused_line_ids() -> None:
+    from core.models import Order, OrderProductAssociation, OrderProductAssociationArchive, db_helper
+
+    async def add_line(order_id: int, product_id: int) -> int:
+        stmt = (
+            insert(OrderProductAssociation)
+            .values(order_id=order_id, product_id=product_id, count=1, unit_price=1)
+            .returning(OrderProductAssociation.id)
+        )
+        line_id = await session.scalar(stmt)
+        await session.commit()
+        return line_id
+
+    async def create_order(product_id: int, created_at: datetime | None = None) -> int:
+        order = await crud.create_order(
+            session=session, order_in=OrderCreate(items=[OrderItemCreate(product_id=product_id)])
+        )
+        if created_at is not None:
+            await session.execute(update(Order).where(Order.id == order.id).values(created_at=created_at))
+            await session.commit()
+        return order.id
+
+    async with db_helper.session_factory() as session:
+        products_in = [ProductCreate(name=f"archived {i}", price=1, description="") for i in range(2)]
+        first_product, second_product = await products_crud.create_products_bulk(
+            session=session, products_in=products_in, batch_size=2
+        )
+        old_order = await create_order(first_product, created_at=datetime(2000, 1, 1))
+        newer_order = await create_order(first_product, created_at=datetime(2000, 1, 2))
+        # the highest line id leaves with the old order, so SQLite hands it out again
+        reused_id = await add_line(old_order, second_product)
+        assert await archive_orders(session=session, created_before=datetime(2000, 1, 1, 12), chunk_size=10) == 1
+        assert await add_line(newer_order, second_product) == reused_id
+
+        await create_order(first_product)
+        assert await archive_orders(session=session, created_before=datetime(2000, 1, 3), chunk_size=10) == 1
+
+        stmt = select(func.count()).where(OrderProductAssociationArchive.source_id == reused_id)
+        assert await session.scalar(stmt) == 2
+        archived = await crud.get_order(session=session, order_id=newer_order)
+    assert archived.archived
+    assert [item.product_id for item in archived.items] == [first_product, second_product]
@@ -0,0 +1,69 @@
+import math
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, func, select
+
+from api_v1.orders import crud
+from api_v1.orders.schemas import OrderCreate, OrderItemCreate
+from api_v1.products import crud as products_crud
+from api_v1.products.schemas import ProductCreate
+from core.settings import settings
+
+
+@contextmanager
+def count_statements() -> Iterator[list[str]]:
+    from core.models import db_helper
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    engine = db_helper.read_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+async def ensure_orders(count: int) -> None:
+    from core.models import Order, db_helper
+
+    async with db_helper.session_factory() as session:
+        missing = count - await session.scalar(select(func.count()).select_from(Order))
+        if missing <= 0:
+            return
+        products_in = [ProductCreate(name=f"listing {i}", price=i + 1, description="") for i in range(2)]
+        product_ids = await products_crud.create_products_bulk(
+            session=session, products_in=products_in, batch_size=len(products_in)
+        )
+        order_in = OrderCreate(items=[OrderItemCreate(product_id=product_id) for product_id in product_ids])
+        for _ in range(missing):
+            await crud.create_order(session=session, order_in=order_in)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("limit", [1, 50, settings.orders.max_page_size])
+async def test_orders_page_is_one_statement_per_chunk(client, limit: int) -> None:
+    await ensure_orders(settings.orders.max_page_size + 2)
+    with count_statements() as statements:
+        response = await client.get("/api/v1/orders/", params={"limit": limit})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == limit
+    # the orders, then their lines per chunk of ids (the page plus its sentinel row)
+    assert len(statements) == 1 + math.ceil((limit + 1) / settings.orders.eager_chunk_size), statements
+
+
+@pytest.mark.anyio
+async def test_chunked_lines_match_a_single_chunk(client, monkeypatch: pytest.MonkeyPatch) -> None:
+    await ensure_orders(60)
+    expected = (await client.get("/api/v1/orders/", params={"limit": 50})).json()
+    monkeypatch.setattr(settings.orders, "eager_chunk_size", 7)
+    with count_statements() as statements:
+        response = await client.get("/api/v1/orders/", params={"limit": 50})
+    assert response.json() == expected
+    assert any(order["items"] for order in expected["items"])
+    assert len(statements) == 1 + math.ceil(51 / 7)
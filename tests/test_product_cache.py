@@ -0,0 +1,46 @@
+from api_v1.products.cache import ProductCache
+from api_v1.products.schemas import Product
+
+
+def make_product(product_id: int = 1, version: int = 1) -> Product:
+    return Product(id=product_id, name="product", price=100, description="", version=version)
+
+
+def test_fill_caches_loaded_product() -> None:
+    cache = ProductCache(max_size=10, ttl_seconds=60)
+    cache.fill(make_product(), cache.fill_token())
+    assert cache.get(1) == make_product()
+
+
+def test_fill_does_not_overwrite_newer_write() -> None:
+    cache = ProductCache(max_size=10, ttl_seconds=60)
+    token = cache.fill_token()
+    cache.set(make_product(version=2))
+    cache.fill(make_product(version=1), token)
+    assert cache.get(1).version == 2
+    assert cache.stale_fills == 1
+
+
+def test_fill_does_not_resurrect_invalidated_product() -> None:
+    cache = ProductCache(max_size=10, ttl_seconds=60)
+    token = cache.fill_token()
+    cache.invalidate(1)
+    cache.fill(make_product(), token)
+    assert cache.get(1) is None
+
+
+def test_fill_older_than_forgotten_writes_is_skipped() -> None:
+    cache = ProductCache(max_size=1, ttl_seconds=60)
+    token = cache.fill_token()
+    cache.set(make_product(product_id=2))
+    cache.set(make_product(product_id=3))
+    cache.fill(make_product(product_id=1), token)
+    assert cache.get(1) is None
+
+
+def test_fill_after_clear_is_skipped() -> None:
+    cache = ProductCache(max_size=10, ttl_seconds=60)
+    token = cache.fill_token()
+    cache.clear()
+    cache.fill(make_product(), token)
+    assert cache.get(1) is None
@@ -0,0 +1,29 @@
+import pytest
+
+from api_v1.products import crud
+from api_v1.products.schemas import ProductCreate
+from core.settings import settings
+
+
+async def create_products(count: int) -> list[int]:
+    from core.models import db_helper
+
+    products_in = [ProductCreate(name=f"batch {i}", price=i, description="") for i in range(count)]
+    async with db_helper.session_factory() as session:
+        return await crud.create_products_bulk(session=session, products_in=products_in, batch_size=count)
+
+
+def test_batch_defaults_allow_more_ids_than_one_chunk() -> None:
+    assert settings.products.batch_max_ids > settings.products.batch_chunk_size
+
+
+@pytest.mark.anyio
+async def test_batch_spans_chunks_in_request_order(client) -> None:
+    count = settings.products.batch_chunk_size + 10
+    ids = await create_products(count)
+    requested = [*reversed(ids), -1]
+    response = await client.get("/api/v1/products/batch/", params={"ids": ",".join(map(str, requested))})
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == requested[:-1]
+    assert body["missing"] == [-1]
@@ -0,0 +1,71 @@
+import itertools
+import sys
+
+import pytest
+from sqlalchemy import Select
+
+from api_v1.products import crud
+from api_v1.products.schemas import ProductSort
+
+FILTERS = (
+    {"price_min": 100},
+    {"price_max": 100},
+    {"price_min": 100, "price_max": 200},
+    {"name_prefix": "ab"},
+    {"name_prefix": "ab", "price_min": 100},
+)
+
+
+def cursor(sort: ProductSort) -> tuple[int | str, int]:
+    return ("ab" if sort is ProductSort.name else 150), 10
+
+
+async def query_plan(stmt: Select) -> list[str]:
+    from core.models import db_helper
+
+    async with db_helper.read_engine.connect() as conn:
+        sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+        return [row.detail for row in result]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("sort", "filters", "paged"),
+    list(itertools.product(ProductSort, FILTERS, (False, True))),
+)
+async def test_filtered_listing_searches_an_index(sort: ProductSort, filters: dict, paged: bool) -> None:
+    stmt = crud.build_products_stmt(limit=50, sort=sort, after=cursor(sort) if paged else None, **filters)
+    plan = await query_plan(stmt)
+    assert plan[0].startswith("SEARCH products USING"), plan
+    assert not any(step.startswith("SCAN") for step in plan), plan
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sort", ProductSort)
+async def test_unfiltered_listing_reads_one_page(sort: ProductSort) -> None:
+    # the first page walks the sort order and stops after `limit` rows; later pages seek
+    first_page = await query_plan(crud.build_products_stmt(limit=50, sort=sort))
+    assert len(first_page) == 1 and first_page[0].startswith("SCAN products"), first_page
+    next_page = await query_plan(crud.build_products_stmt(limit=50, sort=sort, after=cursor(sort)))
+    assert len(next_page) == 1 and next_page[0].startswith("SEARCH products USING"), next_page
+
+
+@pytest.mark.parametrize(
+    ("prefix", "upper_bound"),
+    [
+        ("ab", "ac"),
+        ("a\U0010ffff", "b"),
+        ("퟿", ""),
+        ("\U0010ffff\U0010ffff", None),
+    ],
+)
+def test_name_prefix_upper_bound(prefix: str, upper_bound: str | None) -> None:
+    assert crud.name_prefix_upper_bound(prefix) == upper_bound
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", [chr(sys.maxunicode), "\ud7ff"])
+async def test_name_prefix_without_successor(client, prefix: str) -> None:
+    response = await client.get("/api/v1/products/", params={"name_prefix": prefix})
+    assert response.status_code == 200
@@ -0,0 +1,59 @@
+import asyncio
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy.engine import make_url
+
+from core.retry import retry_counts, retry_give_ups
+from core.settings import settings
+
+PRODUCT = {"name": "contended", "price": 1, "description": ""}
+
+
+@contextmanager
+def write_lock() -> Iterator[None]:
+    # another process-level writer: holds SQLite's write lock until released
+    connection = sqlite3.connect(make_url(settings.db.url).database, isolation_level=None)
+    # the journal mode the application's connections switch the file to; switching
+    # it later needs an exclusive lock, which a held write lock refuses outright
+    connection.execute(f"PRAGMA journal_mode = {settings.db.sqlite_pragmas.journal_mode}")
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def test_deadline_covers_several_busy_waits() -> None:
+    retry = settings.db.retry
+    worst_attempt_ms = settings.db.sqlite_pragmas.busy_timeout + retry.max_delay_ms
+    assert retry.deadline_ms >= retry.max_attempts * worst_attempt_ms
+
+
+@pytest.mark.anyio
+async def test_write_retries_until_lock_is_released(client) -> None:
+    retry_counts.clear()
+    retry_give_ups.clear()
+    busy_timeout = settings.db.sqlite_pragmas.busy_timeout / 1000
+    with write_lock():
+        request = asyncio.ensure_future(client.post("/api/v1/products/", json=PRODUCT))
+        await asyncio.sleep(busy_timeout * 1.5)
+    response = await request
+    assert response.status_code == 201
+    assert retry_counts.total() > 0
+    assert retry_give_ups.total() == 0
+
+
+@pytest.mark.anyio
+async def test_lock_outliving_retries_is_503(client, monkeypatch) -> None:
+    monkeypatch.setattr(settings.db.retry, "max_attempts", 1)
+    busy_timeout = settings.db.sqlite_pragmas.busy_timeout / 1000
+    with write_lock():
+        request = asyncio.ensure_future(client.post("/api/v1/products/", json=PRODUCT))
+        await asyncio.sleep(busy_timeout * 1.5)
+    response = await request
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,42 @@
+import asyncio
+import gc
+
+import pytest
+from sqlalchemy.orm.session import _sessions
+
+REQUESTS = 2000
+
+
+def checked_out() -> dict[str, int]:
+    from core.models import db_helper
+
+    return {name: stats["checked_out"] for name, stats in db_helper.pool_stats().items()}
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_do_not_leak_sessions(client) -> None:
+    response = await client.post("/api/v1/products/", json={"name": "lifecycle", "price": 1, "description": ""})
+    product_id = response.json()["id"]
+
+    def request(i: int):
+        match i % 4:
+            case 0:
+                return client.patch(f"/api/v1/products/{product_id}/", json={"price": i})
+            case 1:
+                return client.get(f"/api/v1/products/{product_id}/")
+            case 2:
+                return client.get("/api/v1/products/", params={"limit": 5})
+            case _:
+                # error responses must release the session too
+                return client.get("/api/v1/products/0/")
+
+    # an unclosed session keeps its connection until the garbage collector breaks its
+    # reference cycles, so keep the collector from hiding a leak
+    gc.disable()
+    try:
+        responses = await asyncio.gather(*(request(i) for i in range(REQUESTS)))
+        assert {response.status_code for response in responses} <= {200, 404}
+        assert checked_out() == {"primary": 0, "read": 0}
+        assert [session for session in list(_sessions.values()) if session.in_transaction()] == []
+    finally:
+        gc.enable()
@@ -0,0 +1,85 @@
+import asyncio
+import sqlite3
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_v1.products import crud
+from api_v1.products.schemas import ProductCreate
+from core.write_coalescer import WriteCoalescer
+
+
+def make_coalescer() -> WriteCoalescer:
+    from core.models import db_helper
+
+    # a long delay, so everything submitted in one gather lands in one batch
+    return WriteCoalescer(session_factory=db_helper.session_factory, max_delay=0.05, max_batch=100)
+
+
+async def count_named(name: str) -> int:
+    from core.models import Product, db_helper
+
+    # a separate connection only sees what has been committed
+    async with db_helper.read_session_factory() as session:
+        return await session.scalar(select(func.count()).where(Product.name == name))
+
+
+@pytest.mark.anyio
+async def test_batch_commits_once() -> None:
+    coalescer = make_coalescer()
+
+    async def visible_to_other_connections(session: AsyncSession) -> int:
+        return await count_named("group commit")
+
+    product_in = ProductCreate(name="group commit", price=1, description="")
+    created, visible = await asyncio.gather(
+        coalescer.submit(crud.insert_product, product_in),
+        coalescer.submit(visible_to_other_connections),
+    )
+    assert visible == 0
+    assert await count_named("group commit") == 1
+    assert coalescer.stats()["flushes"] == 1
+    assert created.name == "group commit"
+
+
+@pytest.mark.anyio
+async def test_failing_operation_only_rejects_its_caller() -> None:
+    coalescer = make_coalescer()
+
+    async def fail(session: AsyncSession) -> None:
+        raise ValueError("rejected")
+
+    results = await asyncio.gather(
+        coalescer.submit(crud.insert_product, ProductCreate(name="kept", price=1, description="")),
+        coalescer.submit(fail),
+        coalescer.submit(crud.insert_product, ProductCreate(name="kept", price=2, description="")),
+        return_exceptions=True,
+    )
+    assert isinstance(results[1], ValueError)
+    assert [result.price for result in (results[0], results[2])] == [1, 2]
+    assert await count_named("kept") == 2
+
+
+@pytest.mark.anyio
+async def test_lock_error_rejects_whole_batch_without_rerunning() -> None:
+    coalescer = make_coalescer()
+    calls: Counter[str] = Counter()
+    locked = OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+
+    async def insert(session: AsyncSession) -> None:
+        calls["insert"] += 1
+
+    async def contended(session: AsyncSession) -> None:
+        calls["contended"] += 1
+        raise locked
+
+    results = await asyncio.gather(
+        coalescer.submit(insert),
+        coalescer.submit(contended),
+        return_exceptions=True,
+    )
+    assert results == [locked, locked]
+    assert calls == {"insert": 1, "contended": 1}